@@ -0,0 +1,146 @@
+"""Initial schema, as Base.metadata.create_all built it at startup
+
+Databases created by the app before migrations existed are already at this
+revision: `alembic stamp 0001` then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("first_name", sa.String(length=50), nullable=False),
+        sa.Column("last_name", sa.String(length=50), nullable=False),
+        sa.Column("phone_number", sa.String(length=15), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.Enum("ACTIVE", "INACTIVE", "PENDING", "SUSPENDED", name="userstatus"), nullable=False),
+        sa.Column(
+            "role",
+            sa.Enum("USER", "ADMIN", "MANAGER", "SALES", "SUPPORT", "MARKETING", "HR", name="userrole"),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("updated_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["updated_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("phone_number"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_id", "users", ["id"], unique=False)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("updated_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["updated_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"], unique=False)
+    op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message", sa.String(length=1000), nullable=False),
+        sa.Column("sender_id", sa.Integer(), nullable=False),
+        sa.Column("receiver_id", sa.Integer(), nullable=False),
+        sa.Column("date_time_sent", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["receiver_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["sender_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_messages_id", "messages", ["id"], unique=False)
+    op.create_index("ix_messages_receiver_id", "messages", ["receiver_id"], unique=False)
+    op.create_index("ix_messages_sender_id", "messages", ["sender_id"], unique=False)
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=True),
+        sa.Column("price", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("updated_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["updated_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_products_id", "products", ["id"], unique=False)
+    op.create_index("ix_products_name", "products", ["name"], unique=True)
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("order_number", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum("REQUEST", "APPROVED", "CANCELLED", name="orderstatus"), nullable=False),
+        sa.Column("requested_by", sa.Integer(), nullable=False),
+        sa.Column("approved_by", sa.Integer(), nullable=True),
+        sa.Column("cancelled_by", sa.Integer(), nullable=True),
+        sa.Column("date_requested", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("date_approved", sa.DateTime(), nullable=True),
+        sa.Column("date_cancelled", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["approved_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["cancelled_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["customer_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"], unique=False)
+    op.create_index("ix_orders_order_number", "orders", ["order_number"], unique=True)
+
+    op.create_table(
+        "product_images",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("image_url", sa.String(length=255), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("updated_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["updated_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_product_images_id", "product_images", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table("product_images")
+    op.drop_table("orders")
+    op.drop_table("products")
+    op.drop_table("messages")
+    op.drop_table("categories")
+    op.drop_table("users")
+    sa.Enum(name="orderstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="userstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,126 @@
+"""Indexes, columns and tables added for the catalog, order and message query paths
+
+Keyset pagination indexes, order updated_at and number sequence, the order_stats
+summary (backfilled), message read_at and the conversation index, and product
+full-text search (Postgres only).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    # Products: catalog listing and search
+    op.create_index("ix_products_category_id_name", "products", ["category_id", "name"])
+    op.create_index("ix_products_category_id_price_id", "products", ["category_id", "price", "id"])
+    op.create_index("ix_products_category_id_created_at_id", "products", ["category_id", "created_at", "id"])
+    op.create_index("ix_products_price_id", "products", ["price", "id"])
+    op.create_index("ix_products_created_at_id", "products", ["created_at", "id"])
+    op.create_index(
+        "ix_products_name_pattern", "products", ["name"], postgresql_ops={"name": "varchar_pattern_ops"}
+    )
+    if postgres:
+        # Keep in step with the DDL events in app/models/products.py
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        op.execute("CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)")
+        op.execute("CREATE INDEX ix_products_name_trgm ON products USING gin (name gin_trgm_ops)")
+
+    # Orders: validators for conditional GET, server-side order numbers
+    with op.batch_alter_table("orders") as batch:
+        batch.add_column(sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    if postgres:
+        # INCREMENT BY is the block reserved per nextval(), it must equal ORDER_NUMBER_BLOCK_SIZE
+        op.execute(
+            sa.schema.CreateSequence(
+                sa.Sequence("orders_order_number_seq", increment=settings.ORDER_NUMBER_BLOCK_SIZE)
+            )
+        )
+        op.execute(
+            "SELECT setval('orders_order_number_seq', coalesce(max(order_number), 0) + 1, false) FROM orders"
+        )
+
+    # Order counts per day, product and status, filled from the existing orders
+    op.create_table(
+        "order_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM("REQUEST", "APPROVED", "CANCELLED", name="orderstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "product_id", "status"),
+    )
+    op.execute(
+        "INSERT INTO order_stats (day, product_id, status, count) "
+        "SELECT CAST(date_requested AS DATE), product_id, status, count(*) FROM orders "
+        "GROUP BY CAST(date_requested AS DATE), product_id, status"
+    )
+
+    # Messages: keyset pagination of sent/received, conversations and read state
+    with op.batch_alter_table("messages") as batch:
+        batch.add_column(sa.Column("read_at", sa.DateTime(), nullable=True))
+        batch.drop_index("ix_messages_sender_id")
+        batch.drop_index("ix_messages_receiver_id")
+        batch.create_index("ix_messages_sender_id_id", ["sender_id", "id"])
+        batch.create_index("ix_messages_receiver_id_id", ["receiver_id", "id"])
+    op.create_index(
+        "ix_messages_conversation",
+        "messages",
+        [
+            sa.text("least(sender_id, receiver_id)" if postgres else "min(sender_id, receiver_id)"),
+            sa.text("greatest(sender_id, receiver_id)" if postgres else "max(sender_id, receiver_id)"),
+            "date_time_sent",
+        ],
+    )
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    op.drop_index("ix_messages_conversation", table_name="messages")
+    with op.batch_alter_table("messages") as batch:
+        batch.drop_index("ix_messages_receiver_id_id")
+        batch.drop_index("ix_messages_sender_id_id")
+        batch.create_index("ix_messages_receiver_id", ["receiver_id"])
+        batch.create_index("ix_messages_sender_id", ["sender_id"])
+        batch.drop_column("read_at")
+
+    op.drop_table("order_stats")
+
+    if postgres:
+        op.execute("DROP SEQUENCE orders_order_number_seq")
+    with op.batch_alter_table("orders") as batch:
+        batch.drop_column("updated_at")
+
+    if postgres:
+        op.execute("DROP INDEX ix_products_name_trgm")
+        op.execute("DROP INDEX ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN search_vector")
+    op.drop_index("ix_products_name_pattern", table_name="products")
+    op.drop_index("ix_products_created_at_id", table_name="products")
+    op.drop_index("ix_products_price_id", table_name="products")
+    op.drop_index("ix_products_category_id_created_at_id", table_name="products")
+    op.drop_index("ix_products_category_id_name", table_name="products")
+    op.drop_index("ix_products_category_id_price_id", table_name="products")
@@ -0,0 +1,56 @@
+"""Message threads summary
+
+One row per user and counterpart with the latest message and the unread count,
+paged newest first by the user's keyset index. Backfilled from messages.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "message_threads",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("counterpart_id", sa.Integer(), nullable=False),
+        sa.Column("last_message_id", sa.Integer(), nullable=False),
+        sa.Column("last_message_at", sa.DateTime(), nullable=False),
+        sa.Column("unread", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["counterpart_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "counterpart_id"),
+    )
+    op.create_index(
+        "ix_message_threads_user_recent", "message_threads", ["user_id", "last_message_at", "counterpart_id"]
+    )
+    # Same rows as crud.message_threads rebuild(): the latest message per (user, counterpart)
+    # and the count of what counterpart sent that is unread, a message to oneself counted once
+    op.execute(
+        "INSERT INTO message_threads (user_id, counterpart_id, last_message_id, last_message_at, unread) "
+        "SELECT user_id, counterpart_id, id, date_time_sent, unread FROM ("
+        "SELECT user_id, counterpart_id, id, date_time_sent, "
+        "sum(unread) OVER (PARTITION BY user_id, counterpart_id) AS unread, "
+        "row_number() OVER (PARTITION BY user_id, counterpart_id ORDER BY date_time_sent DESC, id DESC) AS n "
+        "FROM ("
+        "SELECT sender_id AS user_id, receiver_id AS counterpart_id, id, date_time_sent, 0 AS unread "
+        "FROM messages WHERE sender_id != receiver_id "
+        "UNION ALL "
+        "SELECT receiver_id, sender_id, id, date_time_sent, CASE WHEN read_at IS NULL THEN 1 ELSE 0 END "
+        "FROM messages"
+        ") AS m"
+        ") AS ranked WHERE n = 1"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_message_threads_user_recent", table_name="message_threads")
+    op.drop_table("message_threads")
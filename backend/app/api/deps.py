@@ -1,40 +1,90 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.db.session import get_db
 from app import crud
 from app.core.security import verify_token
+from app.core.cache import principal_cache
+from app.models.user import User
+from datetime import datetime
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
+# Claim of the short-lived tokens that are only accepted by the message stream
+STREAM_TOKEN_SCOPE = "stream"
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-):
+# Cached per user, JSON-safe for the redis backend; the password hash stays in the database
+PRINCIPAL_COLUMNS = [column for column in User.__table__.columns if column.key != "hashed_password"]
+
+
+def principal_entry(user: User) -> dict:
+    return jsonable_encoder({column.key: getattr(user, column.key) for column in PRINCIPAL_COLUMNS})
+
+
+def principal_from_entry(entry: dict) -> User:
+    values = {}
+    for column in PRINCIPAL_COLUMNS:
+        value = entry.get(column.key)
+        if value is not None:
+            python_type = column.type.python_type
+            value = datetime.fromisoformat(value) if python_type is datetime else python_type(value)
+        values[column.key] = value
+    return User(**values)
+
+
+async def user_from_token(db: AsyncSession, token: Optional[str], scope: Optional[str] = None) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = verify_token(token)
-    if payload is None:
+    payload = verify_token(token) if token else None
+    # A scoped token is only good where that scope is asked for
+    if payload is None or payload.get("scope") != scope:
         raise credentials_exception
 
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
 
-    user = crud.user.get_by_email(db, email=email)
+    # The version is read before the database, see VersionedCache
+    version, entry = await principal_cache.get(email)
+    if entry is not None:
+        return principal_from_entry(entry)
+    user = await crud.user.get_by_email(db, email=email)
     if user is None:
         raise credentials_exception
-
+    await principal_cache.set(email, version, principal_entry(user))
     return user
 
 
-def get_current_active_user(current_user: dict = Depends(get_current_user)):
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
+):
+    return await user_from_token(db, token)
+
+
+async def get_current_active_user(current_user: dict = Depends(get_current_user)):
     if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return current_user
+
+
+async def get_stream_user(
+    db: AsyncSession = Depends(get_db),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    cookie_token: Optional[str] = Cookie(None, alias="authToken"),
+    stream_token: Optional[str] = Query(None, alias="token"),
+):
+    """EventSource cannot set headers: besides the Authorization header, take the
+    authToken cookie or a stream token from the query string."""
+    if token or cookie_token or not stream_token:
+        user = await user_from_token(db, token or cookie_token)
+    else:
+        user = await user_from_token(db, stream_token, scope=STREAM_TOKEN_SCOPE)
+    return await get_current_active_user(user)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from app.db.session import get_db
 from app import crud
@@ -12,12 +12,12 @@ router = APIRouter(tags=["auth"])
 
 
 @router.post("/login")
-def login(
+async def login(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = crud.user.authenticate(
+    user = await crud.user.authenticate(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -47,10 +47,10 @@ def login(
 
 
 @router.post("/login-json")
-def login_json(
-    response: Response, user_login: UserLogin, db: Session = Depends(get_db)
+async def login_json(
+    response: Response, user_login: UserLogin, db: AsyncSession = Depends(get_db)
 ):
-    user = crud.user.authenticate(
+    user = await crud.user.authenticate(
         db, email=user_login.email, password=user_login.password
     )
     if not user:
@@ -80,7 +80,7 @@ def login_json(
 
 
 @router.post("/logout")
-def logout(response: Response):
+async def logout(response: Response):
     # Clear the authToken cookie
     response.delete_cookie(
         key="authToken",
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.api.deps import get_current_active_user
+from app.core.conditional import conditional_response
+from app.core.serialization import trusted_response
 from app.models.schemas.category import Category, CategoryCreate, CategoryUpdate
 from app.models.user import User, UserRole
 from app.crud import categories
+from typing import Optional
 
 router = APIRouter()
 
 
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
     if current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
@@ -17,31 +21,48 @@ def get_current_admin_user(
     return current_user
 
 
+@router.get("/categories/", response_model=list[Category])
+async def list_categories(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    page = await categories.get_all_categories(db, skip=skip, limit=limit, cursor=cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
 @router.post("/categories/", response_model=Category)
-def create_category(
+async def create_category(
     category_in: CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    return categories.create(db, category_in, created_by=current_user.id)
+    return await categories.create(db, category_in, created_by=current_user.id)
 
 
 @router.get("/categories/{category_id}", response_model=Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = categories.get(db, category_id)
-    if not category:
+async def get_category(
+    category_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
+    cached = await categories.get_cached(db, category_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    category, etag, last_modified = cached
+    return conditional_response(request, response, etag, last_modified) or trusted_response(category, response)
 
 
 @router.put("/categories/{category_id}", response_model=Category)
-def update_category(
+async def update_category(
     category_id: int,
     category_in: CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    category = categories.update(
+    category = await categories.update(
         db, category_id, category_in, updated_by=current_user.id
     )
     if not category:
@@ -50,11 +71,11 @@ def update_category(
 
 
 @router.delete("/categories/{category_id}")
-def delete_category(
+async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    if not categories.delete(db, category_id):
+    if not await categories.delete(db, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
     return {"detail": "Category deleted"}
@@ -1,32 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.models.schemas.message import Message, MessageCreate, MessageUpdate
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.db.session import get_db, get_session_factory
+from app.db.replicas import get_read_db
+from app.models.schemas.message import Message, MessageCreate, MessageUpdate, Thread
 from app.models.user import User, UserRole
 from app.crud import messages
-from app.api.deps import get_current_active_user
-from typing import List
+from app.api.deps import STREAM_TOKEN_SCOPE, get_current_active_user, get_stream_user
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.pubsub import message_broker
+from app.core.serialization import model_response
+from typing import List, Optional
+from datetime import timedelta
+import asyncio
+import json
 
 router = APIRouter()
 
-def get_current_admin_or_self(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_admin_or_self(current_user: User = Depends(get_current_active_user)) -> User:
     return current_user
 
 @router.post("/messages/", response_model=Message)
-def create_message(
+async def create_message(
     message_in: MessageCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    return messages.create(db, message_in, sender_id=current_user.id)
+    return await messages.create(db, message_in, sender_id=current_user.id)
+
+@router.get("/messages/threads", response_model=List[Thread])
+async def get_threads(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    page = await messages.get_threads(db, current_user.id, skip, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(List[Thread], page.items, response)
+
+@router.get("/messages/threads/{user_id}", response_model=List[Message])
+async def get_thread(
+    user_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    page = await messages.get_thread(db, current_user.id, user_id, skip, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(List[Message], page.items, response)
+
+@router.post("/messages/threads/{user_id}/read")
+async def mark_thread_read(
+    user_id: int,
+    up_to_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    return {"marked": await messages.mark_read(db, current_user.id, user_id, up_to_id)}
+
+def _event(message: dict) -> str:
+    return f"id: {message['id']}\nevent: message\ndata: {json.dumps(message)}\n\n"
+
+@router.post("/messages/stream/token")
+async def create_stream_token(current_user: User = Depends(get_current_active_user)):
+    """Short-lived token for ?token= on the stream, it is refused everywhere else."""
+    token = create_access_token(
+        {"sub": current_user.email, "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=settings.MESSAGE_STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+    return {"token": token, "expires_in": settings.MESSAGE_STREAM_TOKEN_EXPIRE_SECONDS}
+
+@router.get("/messages/stream")
+async def stream_messages(
+    last_id: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    current_user: User = Depends(get_stream_user),
+):
+    """Server-sent events with every message received from now on. A reconnect with
+    Last-Event-ID (or ?last_id=) first replays what arrived after that id. Authenticated
+    by the Authorization header, the authToken cookie or ?token= from /messages/stream/token."""
+    user_id = current_user.id
+    after_id = last_event_id if last_event_id is not None else last_id
+
+    async def events():
+        # Subscribe before replaying, so nothing committed in between is missed
+        async with message_broker.subscribe(f"user:{user_id}") as subscription:
+            yield ": connected\n\n"
+            replayed = set()
+            replay_from = after_id
+            while replay_from is not None:
+                # Short-lived session per page, none is held while the stream idles
+                async with session_factory() as db:
+                    page = [
+                        Message.model_validate(message).model_dump(mode="json")
+                        for message in await messages.get_received_after(
+                            db, user_id, replay_from, settings.MESSAGE_STREAM_BACKFILL
+                        )
+                    ]
+                for message in page:
+                    replayed.add(message["id"])
+                    yield _event(message)
+                if len(page) < settings.MESSAGE_STREAM_BACKFILL:
+                    break
+                replay_from = page[-1]["id"]
+            # A client that fell behind is cut off and catches up on reconnect
+            while not subscription.overflowed or not subscription.queue.empty():
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), settings.MESSAGE_STREAM_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:  # Cut off by the broker
+                    break
+                if message["id"] not in replayed:
+                    yield _event(message)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/messages/{message_id}", response_model=Message)
-def get_message(
+async def get_message(
     message_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    message = messages.get(db, message_id)
+    message = await messages.get(db, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     if current_user.id not in {message.sender_id, message.receiver_id} and current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
@@ -34,48 +147,58 @@ def get_message(
     return message
 
 @router.put("/messages/{message_id}", response_model=Message)
-def update_message(
+async def update_message(
     message_id: int,
     message_in: MessageUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_or_self),
 ):
-    message = messages.get(db, message_id)
+    message = await messages.get(db, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     if current_user.id != message.sender_id and current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
         raise HTTPException(status_code=403, detail="Not authorized")
-    return messages.update(db, message_id, message_in)
+    return await messages.update(db, message_id, message_in)
 
 @router.delete("/messages/{message_id}")
-def delete_message(
+async def delete_message(
     message_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_or_self),
 ):
-    message = messages.get(db, message_id)
+    message = await messages.get(db, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     if current_user.id != message.sender_id and current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
         raise HTTPException(status_code=403, detail="Not authorized")
-    if not messages.delete(db, message_id):
+    if not await messages.delete(db, message_id):
         raise HTTPException(status_code=404, detail="Message not found")
     return {"detail": "Message deleted"}
 
 @router.get("/messages/sent/", response_model=List[Message])
-def get_sent_messages(
-    db: Session = Depends(get_db),
+async def get_sent_messages(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    return messages.get_by_sender(db, current_user.id, skip, limit)
+    page = await messages.get_by_sender(db, current_user.id, skip, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(List[Message], page.items, response)
 
 @router.get("/messages/received/", response_model=List[Message])
-def get_received_messages(
-    db: Session = Depends(get_db),
+async def get_received_messages(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    return messages.get_by_receiver(db, current_user.id, skip, limit)
\ No newline at end of file
+    page = await messages.get_by_receiver(db, current_user.id, skip, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(List[Message], page.items, response)
\ No newline at end of file
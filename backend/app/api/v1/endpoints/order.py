@@ -1,15 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from app.db.session import get_db
-from app.models.schemas.order import Order, OrderCreate, OrderUpdate
+from app.db.replicas import get_read_db, get_read_session_factory
+from app.models.schemas.order import (
+    Order,
+    OrderCreate,
+    OrderUpdate,
+    OrderBatch,
+    OrderBatchResult,
+    OrderStatus,
+    OrderStatsSummary,
+)
 from app.models.user import User, UserRole
 from app.crud import orders
+from app.crud.order_stats import order_stats
 from app.api.deps import get_current_active_user
+from app.core.conditional import conditional_response
+from app.core.serialization import model_response
+from typing import Literal, Optional
+from datetime import date, datetime
+from enum import Enum
+import csv
+import io
+import json
 
 router = APIRouter()
 
 
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
     if current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
@@ -18,70 +38,153 @@ def get_current_admin_user(
 
 
 @router.get("/orders/", response_model=list[Order])
-def get_orders(db: Session = Depends(get_db)):
-    return orders.get_all_orders(db, skip=0, limit=100)
+async def get_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    page = await orders.get_all_orders(db, skip=skip, limit=limit, cursor=cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(list[Order], page.items, response)
+
+
+@router.get("/orders/stats", response_model=OrderStatsSummary)
+async def get_order_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    return await order_stats.get_summary(db, date_from, date_to)
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+@router.get("/orders/export")
+async def export_orders(
+    format: Literal["csv", "ndjson"] = "csv",
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    current_user: User = Depends(get_current_admin_user),
+):
+    columns = [column.key for column in orders.export_columns]
+
+    async def body():
+        async with session_factory() as db:
+            if format == "csv":
+                yield ",".join(columns) + "\r\n"
+            async for rows in orders.stream_export(db, status_filter, date_from, date_to):
+                if format == "csv":
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows([_export_value(value) for value in row] for row in rows)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(dict(zip(columns, map(_export_value, row)))) + "\n" for row in rows
+                    )
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
 
 
 @router.post("/orders/", response_model=Order)
-def create_order(
+async def create_order(
     order_in: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    return orders.create(db, order_in, requested_by=current_user.id)
+    return await orders.create(db, order_in, requested_by=current_user.id)
+
+
+@router.post("/orders/approve", response_model=OrderBatchResult)
+async def approve_orders(
+    batch: OrderBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    return await orders.transition_many(db, batch.order_ids, OrderStatus.APPROVED, current_user.id)
+
+
+@router.post("/orders/cancel", response_model=OrderBatchResult)
+async def cancel_orders(
+    batch: OrderBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    return await orders.transition_many(db, batch.order_ids, OrderStatus.CANCELLED, current_user.id)
 
 
 @router.get("/orders/{order_id}", response_model=Order)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    order = orders.get(db, order_id)
+async def get_order(
+    order_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)
+):
+    order = await orders.get(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
+    # 304 skips serializing the response model
+    return conditional_response(request, response, *orders.validators(order)) or model_response(
+        Order, order, response
+    )
 
 
 @router.put("/orders/{order_id}", response_model=Order)
-def update_order(
+async def update_order(
     order_id: int,
     order_in: OrderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    order = orders.update(db, order_id, order_in, updated_by=current_user.id)
+    order = await orders.update(db, order_id, order_in, updated_by=current_user.id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
 @router.post("/orders/{order_id}/approve", response_model=Order)
-def approve_order(
+async def approve_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    order = orders.approve_order(db, order_id, approved_by=current_user.id)
+    order = await orders.approve_order(db, order_id, approved_by=current_user.id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
 @router.post("/orders/{order_id}/cancel", response_model=Order)
-def cancel_order(
+async def cancel_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    order = orders.cancel_order(db, order_id, cancelled_by=current_user.id)
+    order = await orders.cancel_order(db, order_id, cancelled_by=current_user.id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
 @router.delete("/orders/{order_id}")
-def delete_order(
+async def delete_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    if not orders.delete(db, order_id):
+    if not await orders.delete(db, order_id):
         raise HTTPException(status_code=404, detail="Order not found")
     return {"detail": "Order deleted"}
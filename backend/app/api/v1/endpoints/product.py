@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.schemas.product import Product, ProductCreate, ProductUpdate
 from app.models.user import User, UserRole
 from app.crud import products
+from app.crud.product_import import import_format, import_products
 from app.api.deps import get_current_active_user
+from app.core.conditional import conditional_response
+from app.core.serialization import model_response, trusted_response
+from typing import Literal, Optional
+from decimal import Decimal
 
 router = APIRouter()
 
 
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
     if current_user.role not in {UserRole.ADMIN, UserRole.MANAGER}:
@@ -17,42 +23,98 @@ def get_current_admin_user(
     return current_user
 
 
+@router.get("/products/", response_model=list[Product])
+async def list_products(
+    response: Response,
+    category_id: Optional[int] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    name_prefix: Optional[str] = Query(None, max_length=100),
+    sort: Literal["name", "price", "created_at"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    page = await products.get_all_products(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        name_prefix=name_prefix,
+        sort=sort,
+        descending=order == "desc",
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return model_response(list[Product], page.items, response)
+
+
+@router.get("/products/search", response_model=list[Product])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return model_response(list[Product], await products.search(db, q, skip=skip, limit=limit))
+
+
 @router.post("/products/", response_model=Product)
-def create_product(
+async def create_product(
     product_in: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    return products.create(db, product_in, created_by=current_user.id)
+    return await products.create(db, product_in, created_by=current_user.id)
+
+
+@router.post("/products/import")
+async def import_product_catalog(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+):
+    # Body is read as a stream, never buffered whole
+    fmt = format or import_format(request.headers.get("content-type"))
+    return await import_products(db, request.stream(), fmt, user_id=current_user.id)
 
 
 @router.get("/products/{product_id}", response_model=Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = products.get(db, product_id)
-    if not product:
+async def get_product(
+    product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
+    cached = await products.get_cached(db, product_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    product, etag, last_modified = cached
+    return conditional_response(request, response, etag, last_modified) or trusted_response(product, response)
 
 
 @router.put("/products/{product_id}", response_model=Product)
-def update_product(
+async def update_product(
     product_id: int,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    product = products.update(db, product_id, product_in, updated_by=current_user.id)
+    product = await products.update(db, product_id, product_in, updated_by=current_user.id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 
 @router.delete("/products/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
-    if not products.delete(db, product_id):
+    if not await products.delete(db, product_id):
         raise HTTPException(status_code=404, detail="Product not found")
     return {"detail": "Product deleted"}
@@ -0,0 +1,97 @@
+"""Maintenance commands, run once per deploy rather than on every worker start.
+
+    alembic upgrade head
+    python -m app.cli create-default-user
+    python -m app.cli check-sequences
+    python -m app.cli rebuild-order-stats
+    python -m app.cli rebuild-message-threads
+"""
+import argparse
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.security import password_hasher
+from app.db.session import SessionLocal, engine
+
+
+async def create_default_user():
+    """Create the default admin user if no user exists"""
+    from app.crud.user import user as user_crud
+    from app.models.schemas.user import UserCreate
+    from app.models.user import User
+
+    async with SessionLocal() as db:
+        if await db.scalar(select(User).limit(1)):
+            print("Default user skipped: users already exist")
+            return
+        try:
+            user = await user_crud.create(
+                db,
+                user_in=UserCreate(
+                    email="admin@example.com",
+                    first_name="Biness",
+                    last_name="Chama",
+                    phone_number="0965508033",
+                    password="adminpassword",
+                ),
+            )
+            user.status = "ACTIVE"
+            user.role = "ADMIN"
+            await db.commit()
+        except HTTPException as e:
+            print(f"Default user skipped: {e.detail}")
+            return
+    print("Default admin user created: admin@example.com / adminpassword")
+
+
+async def check_sequences():
+    """Fail the deploy when ORDER_NUMBER_BLOCK_SIZE disagrees with the migrated sequence"""
+    from app.crud.order import orders
+
+    async with SessionLocal() as db:
+        await orders.order_numbers.check(db)
+    print(f"{orders.order_numbers.sequence.name}: ok")
+
+
+async def rebuild_order_stats():
+    from app.crud.order_stats import order_stats
+
+    async with SessionLocal() as db:
+        rows = await order_stats.rebuild(db)
+    print(f"order_stats rebuilt: {rows} rows")
+
+
+async def rebuild_message_threads():
+    from app.crud.message_threads import message_threads
+
+    async with SessionLocal() as db:
+        rows = await message_threads.rebuild(db)
+    print(f"message_threads rebuilt: {rows} rows")
+
+
+COMMANDS = {
+    "check-sequences": check_sequences,
+    "create-default-user": create_default_user,
+    "rebuild-message-threads": rebuild_message_threads,
+    "rebuild-order-stats": rebuild_order_stats,
+}
+
+
+async def run(command):
+    try:
+        await COMMANDS[command]()
+    finally:
+        password_hasher.shutdown()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="B2B Platform maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    asyncio.run(run(parser.parse_args().command))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Sequence, Tuple
+from anyio import to_thread
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+# (route class, methods, path prefix under API_V1_STR), the first match wins.
+# Unmatched requests (and the long-lived message stream) are never limited.
+ROUTE_CLASSES: Sequence[Tuple[str, set, str]] = (
+    ("bulk", {"POST"}, "/products/products/import"),
+    ("bulk", {"GET"}, "/orders/orders/export"),
+    ("auth", {"POST"}, "/auth/login"),
+    ("auth", {"POST"}, "/users/"),  # Sign-up hashes a password too
+    ("catalog", {"GET", "HEAD"}, "/products/"),
+    ("catalog", {"GET", "HEAD"}, "/categories/"),
+    ("order_writes", {"POST", "PUT", "PATCH", "DELETE"}, "/orders/"),
+)
+
+
+class AdmissionClass:
+    """At most limit requests of one route class run at once and at most queue_size
+    wait for a slot. Requests beyond that are shed with 503 instead of queueing
+    without bound, so a saturated class cannot take the others down with it."""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    def admits(self) -> bool:
+        return self.in_flight + self.waiting < self.limit + self.queue_size
+
+    @asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    def __init__(self, classes: Dict[str, AdmissionClass], retry_after: int, prefix: str = settings.API_V1_STR):
+        self.classes = classes
+        self.retry_after = retry_after
+        self.rules = [(classes[name], methods, prefix + path) for name, methods, path in ROUTE_CLASSES]
+
+    def classify(self, method: str, path: str) -> Optional[AdmissionClass]:
+        for route_class, methods, path_prefix in self.rules:
+            if method in methods and path.startswith(path_prefix):
+                return route_class
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "retry_after": self.retry_after,
+            "classes": {name: route_class.stats() for name, route_class in self.classes.items()},
+            "threadpool": threadpool_stats(),
+        }
+
+
+admission = AdmissionController(
+    {
+        "auth": AdmissionClass("auth", settings.ADMISSION_AUTH_LIMIT, settings.ADMISSION_AUTH_QUEUE),
+        "catalog": AdmissionClass("catalog", settings.ADMISSION_CATALOG_LIMIT, settings.ADMISSION_CATALOG_QUEUE),
+        "order_writes": AdmissionClass(
+            "order_writes", settings.ADMISSION_ORDER_WRITES_LIMIT, settings.ADMISSION_ORDER_WRITES_QUEUE
+        ),
+        "bulk": AdmissionClass("bulk", settings.ADMISSION_BULK_LIMIT, settings.ADMISSION_BULK_QUEUE),
+    },
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+)
+
+
+def configure_threadpool(size: int) -> None:
+    # AnyIO's default limiter (40) backs run_in_threadpool: sync dependencies, file uploads.
+    # It belongs to the running event loop, so this runs in the lifespan
+    to_thread.current_default_thread_limiter().total_tokens = size
+
+
+def threadpool_stats() -> dict:
+    try:
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:  # No event loop running
+        return {}
+    statistics = limiter.statistics()
+    return {
+        "size": limiter.total_tokens,
+        "busy": statistics.borrowed_tokens,
+        "waiting": statistics.tasks_waiting,
+    }
+
+
+class AdmissionControlMiddleware:
+    """Runs each request in a slot of its route class (see ROUTE_CLASSES), or answers
+    503 with Retry-After when the class is saturated. Streaming responses hold
+    their slot until the body is sent."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope["type"] == "http":
+            route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not route_class.admits():
+            route_class.rejected += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        async with route_class.slot():
+            await self.app(scope, receive, send)
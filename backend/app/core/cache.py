@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+from app.core.config import settings
+
+
+# Version counters outlive the entries stamped with them (see VersionedCache)
+VERSION_TTL_FACTOR = 2
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire ttl seconds after they are set"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCacheBackend:
+    """Async cache interface over a per-process TTLCache"""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Version counters (see get_version), kept apart from the entries and their stats
+        self._versions = TTLCache(maxsize=maxsize, ttl=ttl * VERSION_TTL_FACTOR)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump_versions(self, *keys: str) -> List[int]:
+        versions = []
+        for key in keys:
+            versions.append(self._versions.get(key, 0) + 1)
+            self._versions.set(key, versions[-1])
+        return versions
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        self._cache.delete(*keys)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """Cache shared by every worker; values must be JSON serializable.
+    Size is bounded by the server's maxmemory policy, not by this class"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, prefix: str = "b2b:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("A redis cache URL is configured but the redis package is not installed") from e
+        self._client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+
+    async def get_version(self, key: str) -> int:
+        # Not counted as a hit or miss, most keys never had a version
+        return int(await self._client.get(self.prefix + key) or 0)
+
+    async def bump_versions(self, *keys: str) -> List[int]:
+        async with self._client.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.incr(self.prefix + key)
+                pipe.pexpire(self.prefix + key, int(self.ttl * VERSION_TTL_FACTOR * 1000))
+            results = await pipe.execute()
+        return results[::2]
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+    def stats(self) -> dict:
+        # Counters are per worker, the shared entries live in redis
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def make_cache_backend(url: Optional[str], maxsize: int, ttl: float):
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url, ttl)
+    return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+
+
+class VersionedCache:
+    """Read-through cache over a backend (every worker shares it when given a
+    redis:// URL) whose fills cannot outlive an invalidation.
+
+    invalidate() bumps the key's version and drops the current entry. A value
+    read from the database before an invalidation is not set after it: set()
+    checks the version read by get() is still current, and the entry is stored
+    under that version, which is never read again once bumped."""
+
+    def __init__(self, backend, prefix: str = ""):
+        self.backend = backend
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Tuple[int, Optional[Any]]:
+        """(version, entry), read the version before the database and set with it"""
+        key = self.prefix + key
+        version = await self.backend.get_version(f"{key}:version")
+        return version, await self.backend.get(f"{key}:{version}")
+
+    async def set(self, key: str, version: int, value: Any) -> None:
+        key = self.prefix + key
+        if await self.backend.get_version(f"{key}:version") == version:
+            await self.backend.set(f"{key}:{version}", value)
+
+    async def invalidate(self, *keys: str) -> None:
+        keys = [self.prefix + key for key in dict.fromkeys(keys)]
+        if not keys:
+            return
+        versions = await self.backend.bump_versions(*(f"{key}:version" for key in keys))
+        await self.backend.delete(*(f"{key}:{version - 1}" for key, version in zip(keys, versions)))
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+# Users resolved by get_current_user, keyed by token subject (email)
+principal_cache = VersionedCache(
+    make_cache_backend(
+        settings.PRINCIPAL_CACHE_URL,
+        maxsize=settings.PRINCIPAL_CACHE_SIZE,
+        ttl=settings.PRINCIPAL_CACHE_TTL,
+    ),
+    prefix="principal:",
+)
+
+# Serialized products and categories for the public detail endpoints
+catalog_cache = VersionedCache(
+    make_cache_backend(
+        settings.CATALOG_CACHE_URL,
+        maxsize=settings.CATALOG_CACHE_SIZE,
+        ttl=settings.CATALOG_CACHE_TTL,
+    )
+)
@@ -0,0 +1,149 @@
+import zlib
+from typing import List, Optional, Tuple
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Events must reach the client as they happen, and browsers handle them poorly compressed
+SKIPPED_TYPES = ("text/event-stream",)
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Best of br/gzip the client accepts, None for identity"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in offered]
+    q, coding = max(candidates, key=lambda candidate: candidate[0])  # Ties keep br
+    return coding if q > 0 else None
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush, so each chunk of a stream reaches the client without waiting for the next
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """gzip (or brotli) per Accept-Encoding. Whole bodies below minimum_size are sent
+    as is; streamed bodies are compressed chunk by chunk, never buffered."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compressor(self, coding: str):
+        return _Brotli(self.brotli_quality) if coding == "br" else _Gzip(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        coding = accepted_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(SKIPPED_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start until the first body chunk tells whether to compress
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                whole_body_too_small = not more_body and len(body) < self.minimum_size
+                if coding is None or whole_body_too_small:
+                    passthrough = True
+                    await send(_with_headers(start, [(b"vary", b"Accept-Encoding")]))
+                    await send(message)
+                    return
+                compressor = self._compressor(coding)
+                headers = [(b"content-encoding", coding.encode()), (b"vary", b"Accept-Encoding")]
+                if not more_body:
+                    # Whole body, sent with its compressed length
+                    data = compressor.finish(body)
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send(_with_headers(start, headers, drop=(b"content-length",)))
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send(_with_headers(start, headers, drop=(b"content-length",)))
+            data = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _with_headers(start: dict, extra: List[Tuple[bytes, bytes]], drop: Tuple[bytes, ...] = ()) -> dict:
+    headers = [(name, value) for name, value in start.get("headers", []) if name.lower() not in drop]
+    for name, value in extra:
+        if name == b"vary":
+            current = [v for n, v in headers if n.lower() == b"vary"]
+            if current and value.lower() in current[0].lower():
+                continue
+            headers = [(n, v) for n, v in headers if n.lower() != b"vary"]
+            value = current[0] + b", " + value if current else value
+        headers.append((name, value))
+    return {**start, "headers": headers}
@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+from fastapi import Request, Response
+
+# Validators for conditional GET. Timestamps are naive UTC, as stored by the models.
+
+
+def make_validators(parts: Iterable, stamps: Iterable[Optional[datetime]]) -> Tuple[str, Optional[datetime]]:
+    """Weak ETag over parts (ids, versions, timestamps) and Last-Modified as the newest stamp"""
+    digest = hashlib.blake2b(repr(tuple(parts)).encode(), digest_size=12).hexdigest()
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return f'W/"{digest}"', max(stamps) if stamps else None
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2)
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified) <= _as_utc(since)
+    return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """The 304 to return when the client's copy is current, otherwise None after
+    setting the validators on the 200 response"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -6,6 +6,9 @@ import secrets
 import json
 import os
 
+# backend/.env, wherever the app is started from
+ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env")
+
 
 class Settings(BaseSettings):
     # Application Configuration
@@ -20,11 +23,84 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = Field(..., validation_alias="POSTGRES_DB")
     POSTGRES_PORT: str = Field("5432", validation_alias="POSTGRES_PORT")
 
+    # Connection Pool Configuration (per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced, -1 disables
+    DB_POOL_PRE_PING: bool = False  # Ping on every checkout instead of relying on recycle
+    DB_ECHO: bool = False  # Log every SQL statement
+
+    # Read replicas, read-only endpoints use them round-robin (see app.db.replicas)
+    DB_REPLICA_URLS: str = ""  # Comma-separated postgresql+asyncpg URLs, each pooled like the primary
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # A user's reads stick to the primary this long after a write
+    DB_READ_YOUR_WRITES_CACHE_URL: Optional[str] = None  # redis:// to share the deadlines between workers
+    DB_READ_YOUR_WRITES_CACHE_SIZE: int = 10000  # Users tracked per process (memory backend)
+
+    # Per-request SQL statistics (Server-Timing / X-DB-Query-Count headers)
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_REPEAT_WARN_THRESHOLD: int = 10  # Warn when one statement repeats more often
+
     # JWT Configuration
     SECRET_KEY: str = Field(..., validation_alias="SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Authenticated user cache (get_current_user), in-process unless a redis:// URL is given
+    PRINCIPAL_CACHE_URL: Optional[str] = None  # Shared backend, needed for invalidations to reach every worker
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Entries per process (memory backend), 0 disables
+    PRINCIPAL_CACHE_TTL: float = 60.0  # Seconds
+
+    # Product/category read-through cache, in-process unless a redis:// URL is given
+    CATALOG_CACHE_URL: Optional[str] = None  # Shared backend for multiple workers
+    CATALOG_CACHE_SIZE: int = 10000  # Entries per process (memory backend), 0 disables
+    CATALOG_CACHE_TTL: float = 300.0  # Seconds, bounds staleness of missed invalidations
+
+    # Bulk product import (POST /products/products/import)
+    IMPORT_BATCH_SIZE: int = 2000  # Rows per INSERT ... ON CONFLICT statement and commit
+    IMPORT_MAX_ERRORS: int = 1000  # Row errors listed in the report, the rest are only counted
+    IMPORT_MAX_RECORD_BYTES: int = 65536  # Longest accepted CSV record / NDJSON line
+
+    # Order numbers reserved per nextval(), changing it needs ALTER SEQUENCE ... INCREMENT BY
+    ORDER_NUMBER_BLOCK_SIZE: int = 100
+
+    # Order export, rows fetched per round trip of the server-side cursor
+    EXPORT_YIELD_PER: int = 1000
+
+    # Message push (SSE), in-process unless a redis:// URL is given
+    MESSAGE_BROKER_URL: Optional[str] = None  # Shared broker for multiple workers
+    MESSAGE_STREAM_QUEUE_SIZE: int = 100  # Undelivered messages before a client is cut off
+    MESSAGE_STREAM_BACKFILL: int = 500  # Messages per replay query on reconnect
+    MESSAGE_STREAM_HEARTBEAT: float = 15.0  # Seconds between keep-alive comments
+    MESSAGE_STREAM_TOKEN_EXPIRE_SECONDS: int = 60  # ?token= for EventSource, which cannot send headers
+
+    # Response compression, turn off behind a proxy that already compresses
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes, smaller bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1 (fastest) to 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0 to 11, brotli is offered only if the package is installed
+
+    # Admission control (see app.core.admission): per route class, LIMIT requests run at
+    # once and QUEUE more wait, the rest get 503. Auth, order writes and bulk together stay
+    # under DB_POOL_SIZE + DB_MAX_OVERFLOW, so they cannot starve catalog reads of connections
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_RETRY_AFTER: int = 1  # Seconds, sent with the 503
+    ADMISSION_AUTH_LIMIT: int = 8
+    ADMISSION_AUTH_QUEUE: int = 32
+    ADMISSION_CATALOG_LIMIT: int = 64
+    ADMISSION_CATALOG_QUEUE: int = 256
+    ADMISSION_ORDER_WRITES_LIMIT: int = 8
+    ADMISSION_ORDER_WRITES_QUEUE: int = 32
+    ADMISSION_BULK_LIMIT: int = 2  # Catalog imports and order exports
+    ADMISSION_BULK_QUEUE: int = 2
+    THREADPOOL_SIZE: int = 40  # AnyIO worker threads (sync dependencies, file uploads)
+
+    # Password Hashing Configuration
+    BCRYPT_ROUNDS: int = 12  # Work factor for new hashes
+    PASSWORD_HASH_WORKERS: int = 2  # Processes dedicated to bcrypt
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # Waiting requests before answering 503
+    PASSWORD_HASH_RETRY_AFTER: int = 1  # Seconds, sent with the 503
+
     # CORS Configuration
     CORS_ORIGINS: List[str] = Field(
         default=[
@@ -41,6 +117,15 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    # Same database through the asyncpg driver, used by the API engine
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    @property
+    def REPLICA_DATABASE_URLS(self) -> List[str]:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
     # Field validators
     @field_validator("SECRET_KEY", mode="before")
     @classmethod
@@ -55,6 +140,13 @@ class Settings(BaseSettings):
             raise ValueError("SECRET_KEY must be at least 32 characters long")
         return v
 
+    @field_validator("BCRYPT_ROUNDS")
+    @classmethod
+    def validate_bcrypt_rounds(cls, v: int) -> int:
+        if not 4 <= v <= 31:
+            raise ValueError("BCRYPT_ROUNDS must be between 4 and 31")
+        return v
+
     @field_validator("ENVIRONMENT")
     @classmethod
     def validate_environment(cls, v: str) -> str:
@@ -65,9 +157,7 @@ class Settings(BaseSettings):
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
     def validate_cors_origins(cls, v: Optional[str | List[str]]) -> List[str]:
-        print(f"Raw CORS_ORIGINS value: {v!r}")  # Debug logging
         if v is None:
-            print("CORS_ORIGINS is None, using default")
             return [
                 "http://localhost:5173",
                 "http://127.0.0.1:5173",
@@ -76,7 +166,6 @@ class Settings(BaseSettings):
             ]
         if isinstance(v, str):
             if not v.strip():
-                print("CORS_ORIGINS is empty string, using default")
                 return [
                     "http://localhost:5173",
                     "http://127.0.0.1:5173",
@@ -89,8 +178,8 @@ class Settings(BaseSettings):
                     if not isinstance(parsed, list):
                         raise ValueError("CORS_ORIGINS JSON must be a list")
                     return parsed
-                except json.JSONDecodeError as e:
-                    print(f"JSON parsing failed: {e}")
+                except json.JSONDecodeError:
+                    pass  # Not JSON after all, parse as comma-separated
             # Handle comma-separated string
             origins = [origin.strip() for origin in v.split(",") if origin.strip()]
             if not origins:
@@ -102,7 +191,7 @@ class Settings(BaseSettings):
             raise ValueError(f"Invalid CORS_ORIGINS type: {type(v)}")
 
     model_config = ConfigDict(
-        env_file="D:/projects/B2B/backend/.env",
+        env_file=ENV_FILE,
         env_file_encoding="utf-8",
         case_sensitive=True,
         extra="ignore",
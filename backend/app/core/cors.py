@@ -5,15 +5,13 @@ from .config import settings
 
 def setup_cors(app: FastAPI):
     """Configure CORS middleware with proper settings"""
-    
-    print(f"🔄 Configuring CORS with origins: {settings.CORS_ORIGINS}")
-    
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.CORS_ORIGINS,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=["*"],
-        expose_headers=["*"],
+        expose_headers=["*", "X-Next-Cursor"],  # "*" is ignored for credentialed requests
         max_age=600,
     )
\ No newline at end of file
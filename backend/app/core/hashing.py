@@ -0,0 +1,20 @@
+# app/core/hashing.py
+# Runs inside the password hashing worker processes, keep imports light
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int):
+    # passlib is imported by the processes that hash, not by every importer of app
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    # The cost of an existing hash is read from the hash itself
+    return _context(rounds).verify(plain_password, hashed_password)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Bounded queue of one subscriber. A subscriber that falls behind is marked
+    overflowed and should reconnect and catch up from the database."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def put(self, payload: Any) -> bool:
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    def cut_off(self) -> None:
+        """Ends the subscription as if it had overflowed, e.g. when the broker lost its feed"""
+        self.overflowed = True
+        try:
+            self.queue.put_nowait(None)  # Wakes a reader waiting on an empty queue
+        except asyncio.QueueFull:
+            pass  # The reader is busy draining and sees the flag once the queue is empty
+
+
+class MemoryBroker:
+    """In-process pub/sub, delivers to subscribers of this worker only"""
+
+    name = "memory"
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.published = 0
+        self.dropped = 0
+
+    def _deliver(self, channel: str, payload: Any) -> None:
+        for subscription in list(self._subscribers.get(channel, ())):
+            if not subscription.put(payload):
+                self.dropped += 1
+
+    async def publish(self, channel: str, payload: Any) -> None:
+        self.published += 1
+        self._deliver(channel, payload)
+
+    async def _listen(self) -> None:
+        pass
+
+    def _cut_off_all(self) -> None:
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.cut_off()
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        await self._listen()
+        subscription = Subscription(self.queue_size)
+        self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers[channel].discard(subscription)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class RedisBroker(MemoryBroker):
+    """Publishes through redis so every worker sees every message. One pattern
+    subscription per process fans out to the local subscribers."""
+
+    name = "redis"
+
+    def __init__(self, url: str, queue_size: int, prefix: str = "b2b:", client=None):
+        super().__init__(queue_size)
+        if client is None:
+            try:
+                from redis import asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("MESSAGE_BROKER_URL uses redis but the redis package is not installed") from e
+            client = redis.from_url(url)
+        self._client = client
+        self.prefix = prefix
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_lock = asyncio.Lock()
+        self.listener_failures = 0
+
+    async def publish(self, channel: str, payload: Any) -> None:
+        self.published += 1
+        await self._client.publish(self.prefix + channel, json.dumps(payload))
+
+    async def _listen(self) -> None:
+        # Subscribers arriving together must not start a listener each (double delivery)
+        async with self._listener_lock:
+            if self._listener is None or self._listener.done():
+                pubsub = self._client.pubsub()
+                await pubsub.psubscribe(self.prefix + "*")
+                self._listener = asyncio.create_task(self._run(pubsub))
+
+    async def _run(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "pmessage":
+                    channel = message["channel"].decode().removeprefix(self.prefix)
+                    self._deliver(channel, json.loads(message["data"]))
+            logger.error("Message broker listener stopped: subscription closed")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Message broker listener stopped")
+        finally:
+            await pubsub.aclose()
+        # Whatever was published from now on would never reach the current subscribers.
+        # Cut them off: they reconnect, which starts a new listener, and replay what
+        # they missed from the database
+        self.listener_failures += 1
+        self._cut_off_all()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "listener_failures": self.listener_failures}
+
+
+def make_broker(url: Optional[str], queue_size: int):
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url, queue_size)
+    return MemoryBroker(queue_size)
+
+
+# New messages, published on "user:<receiver_id>" after commit
+message_broker = make_broker(settings.MESSAGE_BROKER_URL, settings.MESSAGE_STREAM_QUEUE_SIZE)
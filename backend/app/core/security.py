@@ -1,18 +1,97 @@
 from typing import Optional
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
 from app.core.config import settings
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core import hashing
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password, settings.BCRYPT_ROUNDS)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing.hash_password(password, settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated process pool so logins never occupy the event loop
+    or the request threadpool. Requests beyond workers + queue_size are rejected
+    with 503 instead of waiting."""
+
+    def __init__(self, workers: int, queue_size: int, rounds: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit the event loop or pooled DB sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hashing.hash_password, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            hashing.verify_password, plain_password, hashed_password, self.rounds
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    rounds=settings.BCRYPT_ROUNDS,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER,
+)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -24,6 +103,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode.update({"exp": expire})
+    from jose import jwt  # Imported on first use, see warm_up()
+
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -31,6 +112,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def verify_token(token: str) -> dict:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -38,3 +121,9 @@ def verify_token(token: str) -> dict:
         return payload
     except JWTError:
         return None
+
+
+def warm_up() -> None:
+    """Load the JWT backend (python-jose, cryptography) at startup instead of on the
+    first request. Kept out of module import so importing the app stays cheap."""
+    from jose import jwt  # noqa: F401
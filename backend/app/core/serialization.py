@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def adapter(schema: Any) -> TypeAdapter:
+    """One TypeAdapter per response type, building the core schema is the slow part"""
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, content: Any) -> bytes:
+    """Validate ORM objects against schema once and let pydantic-core write the JSON"""
+    type_adapter = adapter(schema)
+    return type_adapter.dump_json(type_adapter.validate_python(content, from_attributes=True))
+
+
+def _with_headers(out: Response, response: Optional[Response]) -> Response:
+    # FastAPI drops headers set on the injected Response when a Response is returned
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+        if response.status_code:
+            out.status_code = response.status_code
+    return out
+
+
+def model_response(schema: Any, content: Any, response: Optional[Response] = None) -> Response:
+    """Response for ORM content, skips FastAPI's dump to dicts and re-encode.
+    Keep response_model on the route for the OpenAPI schema."""
+    return _with_headers(Response(dump_json(schema, content), media_type="application/json"), response)
+
+
+def trusted_response(content: Any, response: Optional[Response] = None) -> Response:
+    """Response for data this app already serialized (e.g. cache entries), not revalidated"""
+    return _with_headers(ORJSONResponse(content), response)
@@ -0,0 +1,106 @@
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException, status
+from app.db.session import Base
+from typing import Any, Dict, Generic, Optional, Tuple, Type, TypeVar
+from functools import cached_property
+
+ModelType = TypeVar("ModelType", bound=Base)
+
+
+class CRUDBase(Generic[ModelType]):
+    """get by id, and writes as a single INSERT/UPDATE/DELETE ... RETURNING.
+
+    The RETURNING row is the session's instance of the model, and sessions are made
+    with expire_on_commit=False, so it stays loaded after the commit: a write needs
+    no refresh() and no SELECT of the row it just wrote.
+    """
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    @cached_property
+    def load_options(self) -> Tuple:
+        # Loader strategies for reads, matching the response schema
+        return ()
+
+    @cached_property
+    def returning_options(self) -> Tuple:
+        # The same relationships for RETURNING statements, which cannot join: immediateload
+        # for many-to-one (no SQL when the target is already in the session), selectinload
+        # for collections
+        return ()
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        return await db.scalar(
+            select(self.model)
+            .options(*self.load_options)
+            .where(self.model.id == id)
+            .execution_options(populate_existing=True)
+        )
+
+    async def _returning(self, db: AsyncSession, stmt, detail: Optional[str]) -> Optional[ModelType]:
+        try:
+            return await db.scalar(stmt, execution_options={"populate_existing": True})
+        except IntegrityError:
+            await db.rollback()
+            if detail is None:
+                raise
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    async def _insert(
+        self,
+        db: AsyncSession,
+        values: Dict[str, Any],
+        detail: Optional[str] = None,
+        commit: bool = True,
+        options: Optional[Tuple] = None,
+    ) -> ModelType:
+        """INSERT ... RETURNING, IntegrityError answered with 400 detail.
+        commit=False leaves the transaction open for the caller's other statements.
+        options replaces returning_options, () returns the columns only."""
+        if options is None:
+            options = self.returning_options
+        db_obj = await self._returning(
+            db, insert(self.model).values(**values).returning(self.model).options(*options), detail
+        )
+        if commit:
+            await db.commit()
+        return db_obj
+
+    async def _update(
+        self,
+        db: AsyncSession,
+        id: int,
+        values: Dict[str, Any],
+        detail: Optional[str] = None,
+        commit: bool = True,
+    ) -> Optional[ModelType]:
+        """UPDATE ... RETURNING, None when there is no such row"""
+        if not values:
+            return await self.get(db, id)
+        db_obj = await self._returning(
+            db,
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**values)
+            .returning(self.model)
+            .options(*self.returning_options),
+            detail,
+        )
+        if commit and db_obj is not None:
+            await db.commit()
+        return db_obj
+
+    async def _delete(
+        self, db: AsyncSession, id: int, detail: Optional[str] = None, commit: bool = True
+    ) -> Optional[ModelType]:
+        """DELETE ... RETURNING, the deleted row (columns only) for the caller's
+        invalidation, None when there is no such row"""
+        db_obj = await self._returning(
+            db, delete(self.model).where(self.model.id == id).returning(self.model), detail
+        )
+        if commit and db_obj is not None:
+            await db.commit()
+        return db_obj
@@ -1,81 +1,97 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.categories import Category
-from app.models.schemas.category import CategoryCreate, CategoryUpdate, Category
-from typing import Optional, List
+from app.models.products import Product
+from app.models.schemas.category import CategoryCreate, CategoryUpdate, Category as CategoryOut
+from app.core.cache import catalog_cache
+from app.core.conditional import make_validators
+from app.crud.base import CRUDBase
+from app.crud.pagination import Page, paginate
+from typing import Optional, Tuple
+from datetime import datetime
 
 
-class CRUDCategories:
-    def get_all_categories(
-        self, db: Session, skip: int = 0, limit: int = 100
-    ) -> List[Category]:
-        return db.query(Category).offset(skip).limit(min(limit, 100)).all()
+class CRUDCategories(CRUDBase[Category]):
+    async def get_all_categories(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[Category]:
+        return await paginate(
+            db, select(Category), [Category.id], skip=skip, limit=limit, cursor=cursor
+        )
 
-    def get(self, db: Session, category_id: int) -> Optional[Category]:
-        return db.query(Category).filter(Category.id == category_id).first()
+    def validators(self, db_category: Category) -> Tuple[str, Optional[datetime]]:
+        return make_validators(
+            ("category", db_category.id, db_category.updated_at), [db_category.updated_at]
+        )
 
-    def create(
-        self, db: Session, category_in: CategoryCreate, created_by: Optional[int] = None
+    async def get_cached(
+        self, db: AsyncSession, category_id: int
+    ) -> Optional[Tuple[dict, str, Optional[datetime]]]:
+        """schemas.Category as a dict with its ETag and Last-Modified, read through catalog_cache"""
+        key = f"category:{category_id}"
+        # The version is read before the database, see VersionedCache
+        version, entry = await catalog_cache.get(key)
+        if entry is None:
+            db_category = await self.get(db, category_id)
+            if not db_category:
+                return None
+            etag, last_modified = self.validators(db_category)
+            entry = {
+                "data": CategoryOut.model_validate(db_category).model_dump(mode="json"),
+                "etag": etag,
+                "last_modified": last_modified.isoformat() if last_modified else None,
+            }
+            await catalog_cache.set(key, version, entry)
+        last_modified = entry["last_modified"]
+        return entry["data"], entry["etag"], datetime.fromisoformat(last_modified) if last_modified else None
+
+    async def invalidate(self, db: AsyncSession, category_id: int) -> None:
+        # Cached products embed their category, so they go stale with it
+        product_ids = await db.scalars(select(Product.id).where(Product.category_id == category_id))
+        await catalog_cache.invalidate(
+            f"category:{category_id}", *(f"product:{product_id}" for product_id in product_ids)
+        )
+
+    async def create(
+        self, db: AsyncSession, category_in: CategoryCreate, created_by: Optional[int] = None
     ) -> Category:
-        try:
-            db_category = Category(
-                name=category_in.name,
-                description=category_in.description,
-                created_by=created_by,
-                updated_by=created_by,
-            )
-            db.add(db_category)
-            db.commit()
-            db.refresh(db_category)
-            return db_category
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Category with this name already exists",
-            )
+        return await self._insert(
+            db,
+            {
+                "name": category_in.name,
+                "description": category_in.description,
+                "created_by": created_by,
+                "updated_by": created_by,
+            },
+            detail="Category with this name already exists",
+        )
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         category_id: int,
         category_in: CategoryUpdate,
         updated_by: Optional[int] = None,
     ) -> Optional[Category]:
-        db_category = self.get(db, category_id)
-        if not db_category:
-            return None
-        try:
-            if category_in.name is not None:
-                db_category.name = category_in.name
-            if category_in.description is not None:
-                db_category.description = category_in.description
-            db_category.updated_by = updated_by
-            db.commit()
-            db.refresh(db_category)
-            return db_category
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Category with this name already exists",
-            )
+        values = category_in.model_dump(include={"name", "description"}, exclude_none=True)
+        db_category = await self._update(
+            db,
+            category_id,
+            {**values, "updated_by": updated_by},
+            detail="Category with this name already exists",
+        )
+        if db_category:
+            await self.invalidate(db, category_id)
+        return db_category
 
-    def delete(self, db: Session, category_id: int) -> bool:
-        db_category = self.get(db, category_id)
+    async def delete(self, db: AsyncSession, category_id: int) -> bool:
+        db_category = await self._delete(
+            db, category_id, detail="Cannot delete category with associated products"
+        )
         if not db_category:
             return False
-        try:
-            db.delete(db_category)
-            db.commit()
-            return True
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot delete category with associated products",
-            )
-
+        # No product can still point at it, so only its own entry goes
+        await catalog_cache.invalidate(f"category:{category_id}")
+        return True
 
-categories = CRUDCategories()
+categories = CRUDCategories(Category)
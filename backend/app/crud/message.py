@@ -1,90 +1,214 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException, status
-from app.models.messages import Messages
-from app.models.schemas.message import MessageCreate, MessageUpdate
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import immediateload, joinedload
+from app.models.message_threads import MessageThreads
+from app.models.messages import Messages, conversation_key
+from app.models.schemas.message import MessageCreate, MessageUpdate, Message as MessageOut
+from app.core.pubsub import message_broker
+from app.crud.base import CRUDBase
+from app.crud.message_threads import message_threads
+from app.crud.pagination import Page, paginate
 from typing import Optional, List
+from functools import cached_property
+import logging
 
+logger = logging.getLogger(__name__)
 
-class CRUDMessages:
-    def get_all_messages(
-        self, db: Session, skip: int = 0, limit: int = 100
-    ) -> List[Messages]:
-        return db.query(Messages).offset(skip).limit(min(limit, 100)).all()
 
-    def get(self, db: Session, message_id: int) -> Optional[Messages]:
-        return db.query(Messages).filter(Messages.id == message_id).first()
+class CRUDMessages(CRUDBase[Messages]):
+    @cached_property
+    def load_options(self):
+        # Loader strategies matching schemas.Message: both users are many-to-one, joined into one SELECT
+        return (joinedload(Messages.sender), joinedload(Messages.receiver))
+
+    @cached_property
+    def returning_options(self):
+        return (immediateload(Messages.sender), immediateload(Messages.receiver))
 
-    def create(
-        self, db: Session, message_in: MessageCreate, sender_id: int
+    async def get_all_messages(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[Messages]:
+        # Newest first
+        return await paginate(
+            db,
+            select(Messages).options(*self.load_options),
+            [Messages.id],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def create(
+        self, db: AsyncSession, message_in: MessageCreate, sender_id: int
     ) -> Messages:
+        db_message = await self._insert(
+            db,
+            {"message": message_in.message, "sender_id": sender_id, "receiver_id": message_in.receiver_id},
+            detail="Invalid sender or receiver ID",
+            commit=False,
+            options=(),
+        )
+        await message_threads.record(db, db_message)
+        # Both users joined into one SELECT, instead of one immediateload each
+        db_message = await self.get(db, db_message.id)
+        await db.commit()
+        # Push to the receiver's open streams, only once it is committed. The message is
+        # saved either way, a stream that misses it replays it on reconnect
         try:
-            db_message = Messages(
-                message=message_in.message,
-                sender_id=sender_id,
-                receiver_id=message_in.receiver_id,
-            )
-            db.add(db_message)
-            db.commit()
-            db.refresh(db_message)
-            return db_message
-        except IntegrityError:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid sender or receiver ID",
+            await message_broker.publish(
+                f"user:{db_message.receiver_id}", MessageOut.model_validate(db_message).model_dump(mode="json")
             )
+        except Exception:
+            logger.exception("Could not publish message %s", db_message.id)
+        return db_message
 
-    def update(
-        self, db: Session, message_id: int, message_in: MessageUpdate
+    async def update(
+        self, db: AsyncSession, message_id: int, message_in: MessageUpdate
     ) -> Optional[Messages]:
-        db_message = self.get(db, message_id)
-        if not db_message:
-            return None
-        try:
-            if message_in.message is not None:
-                db_message.message = message_in.message
-            if message_in.receiver_id is not None:
-                db_message.receiver_id = message_in.receiver_id
-            db.commit()
-            db.refresh(db_message)
-            return db_message
-        except IntegrityError:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid receiver ID",
+        values = message_in.model_dump(include={"message", "receiver_id"}, exclude_none=True)
+        if "receiver_id" not in values:
+            return await self._update(db, message_id, values, detail="Invalid receiver ID")
+        # The message moves to another conversation: both threads are recomputed, the
+        # old receiver is read first, locked, as CRUDOrders does for its stats key
+        old = (
+            await db.execute(
+                select(Messages.sender_id, Messages.receiver_id).where(Messages.id == message_id).with_for_update()
             )
+        ).first()
+        if old is None:
+            return None
+        db_message = await self._update(db, message_id, values, detail="Invalid receiver ID", commit=False)
+        await message_threads.refresh(db, tuple(old), (db_message.sender_id, db_message.receiver_id))
+        await db.commit()
+        return db_message
 
-    def delete(self, db: Session, message_id: int) -> bool:
-        db_message = self.get(db, message_id)
+    async def delete(self, db: AsyncSession, message_id: int) -> bool:
+        db_message = await self._delete(db, message_id, commit=False)
         if not db_message:
             return False
-        db.delete(db_message)
-        db.commit()
+        await message_threads.refresh(db, (db_message.sender_id, db_message.receiver_id))
+        await db.commit()
         return True
 
-    def get_by_sender(
-        self, db: Session, sender_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Messages]:
-        return (
-            db.query(Messages)
-            .filter(Messages.sender_id == sender_id)
-            .offset(skip)
-            .limit(min(limit, 100))
-            .all()
+    async def get_by_sender(
+        self,
+        db: AsyncSession,
+        sender_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page[Messages]:
+        # Newest first, served by the (sender_id, id) index
+        return await paginate(
+            db,
+            select(Messages)
+            .options(*self.load_options)
+            .where(Messages.sender_id == sender_id),
+            [Messages.id],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
         )
 
-    def get_by_receiver(
-        self, db: Session, receiver_id: int, skip: int = 0, limit: int = 100
+    async def get_received_after(
+        self, db: AsyncSession, receiver_id: int, after_id: int, limit: int
     ) -> List[Messages]:
-        return (
-            db.query(Messages)
-            .filter(Messages.receiver_id == receiver_id)
-            .offset(skip)
-            .limit(min(limit, 100))
-            .all()
+        # Oldest first, to replay a stream from its last event id
+        return list(
+            await db.scalars(
+                select(Messages)
+                .options(*self.load_options)
+                .where(Messages.receiver_id == receiver_id, Messages.id > after_id)
+                .order_by(Messages.id)
+                .limit(limit)
+            )
+        )
+
+    async def get_by_receiver(
+        self,
+        db: AsyncSession,
+        receiver_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page[Messages]:
+        # Newest first, served by the (receiver_id, id) index
+        return await paginate(
+            db,
+            select(Messages)
+            .options(*self.load_options)
+            .where(Messages.receiver_id == receiver_id),
+            [Messages.id],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def get_threads(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page[MessageThreads]:
+        """Conversations of user_id, newest first, with the latest message and the unread
+        count: one SELECT of the page's rows of ix_message_threads_user_recent"""
+        return await paginate(
+            db,
+            select(MessageThreads)
+            .options(*message_threads.load_options)
+            .where(MessageThreads.user_id == user_id)
+            # The rows are updated in place by statements, not through the session
+            .execution_options(populate_existing=True),
+            [MessageThreads.last_message_at, MessageThreads.counterpart_id],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def get_thread(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        counterpart_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Page[Messages]:
+        # Newest first, served by ix_messages_conversation
+        low, high = conversation_key(Messages.sender_id, Messages.receiver_id)
+        return await paginate(
+            db,
+            select(Messages)
+            .options(*self.load_options)
+            .where(low == min(user_id, counterpart_id), high == max(user_id, counterpart_id)),
+            [Messages.date_time_sent, Messages.id],
+            descending=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def mark_read(
+        self, db: AsyncSession, user_id: int, counterpart_id: int, up_to_id: Optional[int] = None
+    ) -> int:
+        """Mark what counterpart sent to user_id (up to a message id) as read"""
+        stmt = update(Messages).where(
+            Messages.sender_id == counterpart_id,
+            Messages.receiver_id == user_id,
+            Messages.read_at.is_(None),
         )
+        if up_to_id is not None:
+            stmt = stmt.where(Messages.id <= up_to_id)
+        result = await db.execute(stmt.values(read_at=func.now()))
+        await message_threads.mark_read(db, user_id, counterpart_id, result.rowcount)
+        await db.commit()
+        return result.rowcount
 
 
-messages = CRUDMessages()
+messages = CRUDMessages(Messages)
@@ -0,0 +1,126 @@
+from functools import cached_property
+from typing import Tuple
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, text, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models.message_threads import MessageThreads
+from app.models.messages import Messages, conversation_key
+
+THREAD_COLUMNS = ["user_id", "counterpart_id", "last_message_id", "last_message_at", "unread"]
+
+
+class CRUDMessageThreads:
+    @cached_property
+    def load_options(self) -> Tuple:
+        # schemas.Thread: the counterpart and the latest message with both its users, one SELECT
+        last_message = joinedload(MessageThreads.last_message)
+        return (
+            joinedload(MessageThreads.counterpart),
+            last_message.joinedload(Messages.sender),
+            last_message.joinedload(Messages.receiver),
+        )
+
+    async def record(self, db: AsyncSession, message: Messages) -> None:
+        """Add a new message to both users' threads in one upsert, in the caller's transaction"""
+        rows = [
+            {
+                "user_id": user_id,
+                "counterpart_id": counterpart_id,
+                "last_message_id": message.id,
+                "last_message_at": message.date_time_sent,
+                "unread": unread,
+            }
+            # Same key order in every transaction, so concurrent upserts cannot deadlock
+            for user_id, counterpart_id, unread in sorted(
+                {(message.receiver_id, message.sender_id, 1), (message.sender_id, message.receiver_id, 0)}
+            )
+            # A message to oneself is one thread, unread
+            if unread or message.sender_id != message.receiver_id
+        ]
+        upsert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = upsert(MessageThreads).values(rows)
+        # A concurrent message may have committed a later one already
+        newer = tuple_(stmt.excluded.last_message_at, stmt.excluded.last_message_id) > tuple_(
+            MessageThreads.last_message_at, MessageThreads.last_message_id
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[MessageThreads.user_id, MessageThreads.counterpart_id],
+                set_={
+                    "last_message_id": case((newer, stmt.excluded.last_message_id), else_=MessageThreads.last_message_id),
+                    "last_message_at": case((newer, stmt.excluded.last_message_at), else_=MessageThreads.last_message_at),
+                    "unread": MessageThreads.unread + stmt.excluded.unread,
+                },
+            )
+        )
+
+    async def mark_read(self, db: AsyncSession, user_id: int, counterpart_id: int, count: int) -> None:
+        """count messages from counterpart_id were just marked read, in the caller's transaction"""
+        if count:
+            await db.execute(
+                update(MessageThreads)
+                .where(MessageThreads.user_id == user_id, MessageThreads.counterpart_id == counterpart_id)
+                .values(unread=MessageThreads.unread - count)
+            )
+
+    def _threads(self, *pairs: Tuple[int, int]):
+        """SELECT of the thread rows recomputed from messages, of the given conversations
+        only (each served by ix_messages_conversation) or of all of them"""
+        sent = select(
+            Messages.sender_id, Messages.receiver_id, Messages.id, Messages.date_time_sent, literal(0)
+        ).where(Messages.sender_id != Messages.receiver_id)
+        received = select(
+            Messages.receiver_id,
+            Messages.sender_id,
+            Messages.id,
+            Messages.date_time_sent,
+            case((Messages.read_at.is_(None), 1), else_=0),
+        )
+        if pairs:
+            low, high = conversation_key(Messages.sender_id, Messages.receiver_id)
+            in_pairs = or_(*(and_(low == min(pair), high == max(pair)) for pair in pairs))
+            sent, received = sent.where(in_pairs), received.where(in_pairs)
+        messages = union_all(sent, received).subquery()
+        user_id, counterpart_id, message_id, sent_at, unread = messages.c
+        thread = [user_id, counterpart_id]
+        ranked = select(
+            user_id,
+            counterpart_id,
+            message_id,
+            sent_at,
+            func.sum(unread).over(partition_by=thread).label("unread"),
+            func.row_number().over(partition_by=thread, order_by=[sent_at.desc(), message_id.desc()]).label("n"),
+        ).subquery()
+        return select(*list(ranked.c)[:5]).where(ranked.c.n == 1)
+
+    async def refresh(self, db: AsyncSession, *pairs: Tuple[int, int]) -> None:
+        """Recompute the threads of the conversations between each pair of users, after
+        a message left one of them (deleted or sent to someone else). Reads the whole
+        conversation, sending and reading adjust the rows in place instead (record, mark_read)"""
+        keys = sorted({key for a, b in pairs for key in ((a, b), (b, a))})
+        await db.execute(
+            delete(MessageThreads).where(
+                or_(
+                    *(
+                        and_(MessageThreads.user_id == user_id, MessageThreads.counterpart_id == counterpart_id)
+                        for user_id, counterpart_id in keys
+                    )
+                )
+            )
+        )
+        await db.execute(insert(MessageThreads).from_select(THREAD_COLUMNS, self._threads(*pairs)))
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Recompute every thread from messages, returns the number of thread rows"""
+        if db.bind.dialect.name == "postgresql":
+            # Message writes wait until the rebuilt threads are committed
+            await db.execute(text("LOCK TABLE messages IN SHARE MODE"))
+        await db.execute(delete(MessageThreads))
+        result = await db.execute(insert(MessageThreads).from_select(THREAD_COLUMNS, self._threads()))
+        await db.commit()
+        return result.rowcount
+
+
+message_threads = CRUDMessageThreads()
@@ -1,108 +1,207 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException, status
-from app.models.orders import Orders
-from app.models.schemas.order import OrderCreate, OrderUpdate, OrderStatus
-from typing import Optional, List
-
-class CRUDOrders:
-    def get_all_orders(self, db: Session, skip: int = 0, limit: int = 100) -> List[Orders]:
-        return db.query(Orders).offset(skip).limit(min(limit, 100)).all()
-
-    def get(self, db: Session, order_id: int) -> Optional[Orders]:
-        return db.query(Orders).filter(Orders.id == order_id).first()
-
-    def create(self, db: Session, order_in: OrderCreate, requested_by: int) -> Orders:
-        try:
-            db_order = Orders(
-                order_number=order_in.order_number,
-                product_id=order_in.product_id,
-                customer_id=order_in.customer_id,
-                requested_by=requested_by,
-            )
-            db.add(db_order)
-            db.commit()
-            db.refresh(db_order)
-            return db_order
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Order number already exists or invalid product/customer ID",
-            )
+from sqlalchemy import Integer, any_, literal, select, update, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import immediateload, joinedload
+from app.models.orders import Orders, order_number_seq
+from app.models.schemas.order import OrderCreate, OrderUpdate, OrderStatus, OrderBatchResult
+from app.crud.base import CRUDBase
+from app.crud.pagination import Page, paginate
+from app.db.sequence import BlockSequence
+from app.crud.order_stats import order_stats, stats_key
+from collections import Counter
+from app.core.conditional import make_validators
+from app.core.config import settings
+from typing import AsyncIterator, Optional, List, Sequence, Tuple
+from functools import cached_property
+from datetime import datetime
+
+class CRUDOrders(CRUDBase[Orders]):
+    @cached_property
+    def load_options(self):
+        # Loader strategies matching schemas.Order: both are many-to-one, joined into one SELECT
+        return (joinedload(Orders.product), joinedload(Orders.customer))
+
+    @cached_property
+    def returning_options(self):
+        return (immediateload(Orders.product), immediateload(Orders.customer))
+
+    # Numbers come from blocks reserved per process, so most creates need no extra round trip
+    order_numbers = BlockSequence(order_number_seq, Orders.order_number)
+
+    async def get_all_orders(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[Orders]:
+        return await paginate(
+            db,
+            select(Orders).options(*self.load_options),
+            [Orders.id],
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
 
-    def update(self, db: Session, order_id: int, order_in: OrderUpdate, updated_by: Optional[int] = None) -> Optional[Orders]:
-        db_order = self.get(db, order_id)
+    def validators(self, db_order: Orders) -> Tuple[str, Optional[datetime]]:
+        # The response embeds the product and customer, so their stamps count too
+        stamps = [db_order.updated_at, db_order.product.updated_at, db_order.customer.updated_at]
+        return make_validators(
+            ("order", db_order.id, db_order.product_id, db_order.customer_id, *stamps), stamps
+        )
+
+    # Flat columns of the export, no relationships
+    export_columns = (
+        Orders.id,
+        Orders.order_number,
+        Orders.status,
+        Orders.product_id,
+        Orders.customer_id,
+        Orders.requested_by,
+        Orders.approved_by,
+        Orders.cancelled_by,
+        Orders.date_requested,
+        Orders.date_approved,
+        Orders.date_cancelled,
+    )
+
+    async def stream_export(
+        self,
+        db: AsyncSession,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> AsyncIterator[Sequence]:
+        """Batches of export_columns rows read through a server-side cursor,
+        EXPORT_YIELD_PER rows at a time"""
+        stmt = select(*self.export_columns).order_by(Orders.id)
+        if status is not None:
+            stmt = stmt.where(Orders.status == status)
+        if date_from is not None:
+            stmt = stmt.where(Orders.date_requested >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Orders.date_requested < date_to)
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+        async for rows in result.partitions():
+            yield rows
+
+    def _stats_key(self, db_order: Orders):
+        return stats_key(db_order.date_requested.date(), db_order.product_id, db_order.status)
+
+    async def _update_with_stats(
+        self, db: AsyncSession, order_id: int, values: dict, detail: str
+    ) -> Optional[Orders]:
+        """UPDATE ... RETURNING plus the stats move, in one transaction. The stats need
+        the old key, so the order is read first, locked: a concurrent write to the same
+        order waits for this commit and then reads the key this one left behind"""
+        db_order = await db.scalar(
+            select(Orders)
+            .options(*self.load_options)
+            .where(Orders.id == order_id)
+            .with_for_update(of=Orders)
+            .execution_options(populate_existing=True)
+        )
         if not db_order:
             return None
-        try:
-            if order_in.order_number is not None:
-                db_order.order_number = order_in.order_number
-            if order_in.product_id is not None:
-                db_order.product_id = order_in.product_id
-            if order_in.customer_id is not None:
-                db_order.customer_id = order_in.customer_id
-            if order_in.status is not None:
-                db_order.status = order_in.status
-                if order_in.status == OrderStatus.APPROVED:
-                    db_order.approved_by = updated_by
-                    db_order.date_approved = func.now()
-                elif order_in.status == OrderStatus.CANCELLED:
-                    db_order.cancelled_by = updated_by
-                    db_order.date_cancelled = func.now()
-            db.commit()
-            db.refresh(db_order)
-            return db_order
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Order number already exists or invalid product/customer ID",
-            )
+        old_key = self._stats_key(db_order)
+        db_order = await self._update(db, order_id, values, detail=detail, commit=False)
+        if not db_order:
+            return None
+        new_key = self._stats_key(db_order)
+        if new_key != old_key:
+            await order_stats.apply(db, Counter({old_key: -1, new_key: 1}))
+        await db.commit()
+        return db_order
+
+    async def create(self, db: AsyncSession, order_in: OrderCreate, requested_by: int) -> Orders:
+        db_order = await self._insert(
+            db,
+            {
+                "order_number": await self.order_numbers.next(db),
+                "product_id": order_in.product_id,
+                "customer_id": order_in.customer_id,
+                "requested_by": requested_by,
+            },
+            detail="Invalid product or customer ID",
+            commit=False,
+            options=(),
+        )
+        # Product and customer joined into one SELECT, instead of one immediateload each
+        db_order = await self.get(db, db_order.id)
+        await order_stats.apply(db, Counter({self._stats_key(db_order): 1}))
+        await db.commit()
+        return db_order
 
-    def delete(self, db: Session, order_id: int) -> bool:
-        db_order = self.get(db, order_id)
+    async def update(self, db: AsyncSession, order_id: int, order_in: OrderUpdate, updated_by: Optional[int] = None) -> Optional[Orders]:
+        values = order_in.model_dump(
+            include={"product_id", "customer_id", "status"}, exclude_none=True
+        )
+        if order_in.status == OrderStatus.APPROVED:
+            values.update(approved_by=updated_by, date_approved=func.now())
+        elif order_in.status == OrderStatus.CANCELLED:
+            values.update(cancelled_by=updated_by, date_cancelled=func.now())
+        return await self._update_with_stats(
+            db, order_id, values, "Invalid product or customer ID"
+        )
+
+    async def delete(self, db: AsyncSession, order_id: int) -> bool:
+        db_order = await self._delete(db, order_id, commit=False)
         if not db_order:
             return False
-        db.delete(db_order)
-        db.commit()
+        await order_stats.apply(db, Counter({self._stats_key(db_order): -1}))
+        await db.commit()
         return True
 
-    def approve_order(self, db: Session, order_id: int, approved_by: int) -> Optional[Orders]:
-        db_order = self.get(db, order_id)
-        if not db_order:
-            return None
-        try:
-            db_order.status = OrderStatus.APPROVED
-            db_order.approved_by = approved_by
-            db_order.date_approved = func.now()
-            db.commit()
-            db.refresh(db_order)
-            return db_order
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Error approving order",
-            )
+    async def approve_order(self, db: AsyncSession, order_id: int, approved_by: int) -> Optional[Orders]:
+        return await self._update_with_stats(
+            db,
+            order_id,
+            {"status": OrderStatus.APPROVED, "approved_by": approved_by, "date_approved": func.now()},
+            "Error approving order",
+        )
 
-    def cancel_order(self, db: Session, order_id: int, cancelled_by: int) -> Optional[Orders]:
-        db_order = self.get(db, order_id)
-        if not db_order:
-            return None
-        try:
-            db_order.status = OrderStatus.CANCELLED
-            db_order.cancelled_by = cancelled_by
-            db_order.date_cancelled = func.now()
-            db.commit()
-            db.refresh(db_order)
-            return db_order
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Error cancelling order",
+    async def cancel_order(self, db: AsyncSession, order_id: int, cancelled_by: int) -> Optional[Orders]:
+        return await self._update_with_stats(
+            db,
+            order_id,
+            {"status": OrderStatus.CANCELLED, "cancelled_by": cancelled_by, "date_cancelled": func.now()},
+            "Error cancelling order",
+        )
+
+    async def transition_many(
+        self, db: AsyncSession, order_ids: List[int], new_status: OrderStatus, user_id: int
+    ) -> OrderBatchResult:
+        """Approve or cancel every order still in REQUEST with one UPDATE ... RETURNING,
+        plus one SELECT to tell skipped ids from missing ones when not all applied"""
+        order_ids = sorted(set(order_ids))
+        if db.bind.dialect.name == "postgresql":
+            # One array parameter, so the statement is the same for any batch size
+            in_batch = Orders.id == any_(literal(order_ids, ARRAY(Integer)))
+        else:
+            in_batch = Orders.id.in_(order_ids)  # SQLite (tests) has no arrays
+        if new_status == OrderStatus.APPROVED:
+            values = {"approved_by": user_id, "date_approved": func.now()}
+        else:
+            values = {"cancelled_by": user_id, "date_cancelled": func.now()}
+        rows = (
+            await db.execute(
+                update(Orders)
+                .where(in_batch, Orders.status == OrderStatus.REQUEST)
+                .values(status=new_status, **values)
+                .returning(Orders.id, Orders.product_id, Orders.date_requested)
             )
+        ).all()
+        deltas = Counter()
+        for _, product_id, date_requested in rows:
+            deltas[stats_key(date_requested.date(), product_id, OrderStatus.REQUEST)] -= 1
+            deltas[stats_key(date_requested.date(), product_id, new_status)] += 1
+        await order_stats.apply(db, deltas)
+        await db.commit()
+        applied = {row.id for row in rows}
+        existing = set(applied)
+        if len(applied) < len(order_ids):
+            existing.update(await db.scalars(select(Orders.id).where(in_batch)))
+        return OrderBatchResult(
+            applied=sorted(applied),
+            skipped=[order_id for order_id in order_ids if order_id in existing - applied],
+            missing=[order_id for order_id in order_ids if order_id not in existing],
+        )
 
-orders = CRUDOrders()
\ No newline at end of file
+orders = CRUDOrders(Orders)
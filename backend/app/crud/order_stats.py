@@ -0,0 +1,93 @@
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Optional, Tuple
+from sqlalchemy import Date, cast, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.order_stats import OrderStats
+from app.models.orders import Orders
+from app.models.schemas.order import OrderStatsSummary
+
+# (day, product_id, status value)
+StatsKey = Tuple[date, int, str]
+
+
+def stats_key(day: date, product_id: int, status) -> StatsKey:
+    # Model and schema OrderStatus are different enums, key on the value
+    return day, product_id, getattr(status, "value", status)
+
+
+class CRUDOrderStats:
+    async def apply(self, db: AsyncSession, deltas: Counter) -> None:
+        """Add deltas to the summary in one upsert, in the caller's transaction"""
+        rows = [
+            {"day": day, "product_id": product_id, "status": status, "count": delta}
+            # Same key order in every transaction, so concurrent upserts cannot deadlock
+            for (day, product_id, status), delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+        upsert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = upsert(OrderStats).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[OrderStats.day, OrderStats.product_id, OrderStats.status],
+                set_={"count": OrderStats.count + stmt.excluded.count},
+            )
+        )
+
+    async def get_summary(
+        self,
+        db: AsyncSession,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> OrderStatsSummary:
+        """Reads the summary rows only, never orders"""
+        stmt = select(OrderStats.day, OrderStats.product_id, OrderStats.status, OrderStats.count).where(
+            OrderStats.count != 0
+        )
+        if date_from is not None:
+            stmt = stmt.where(OrderStats.day >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(OrderStats.day <= date_to)
+        by_status = Counter()
+        by_product = defaultdict(Counter)
+        by_day = defaultdict(Counter)
+        for day, product_id, status, count in await db.execute(stmt):
+            by_status[status.value] += count
+            by_product[product_id][status.value] += count
+            by_day[day][status.value] += count
+        return OrderStatsSummary(
+            total=sum(by_status.values()),
+            by_status=by_status,
+            by_product=[
+                {"product_id": product_id, "total": sum(counts.values()), "by_status": counts}
+                for product_id, counts in sorted(by_product.items())
+            ],
+            by_day=[
+                {"day": day, "total": sum(counts.values()), "by_status": counts}
+                for day, counts in sorted(by_day.items())
+            ],
+        )
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Recompute the summary from orders, returns the number of summary rows"""
+        if db.bind.dialect.name == "postgresql":
+            # Order writes wait until the rebuilt summary is committed
+            await db.execute(text("LOCK TABLE orders IN SHARE MODE"))
+        await db.execute(delete(OrderStats))
+        day = cast(Orders.date_requested, Date)
+        result = await db.execute(
+            insert(OrderStats).from_select(
+                ["day", "product_id", "status", "count"],
+                select(day, Orders.product_id, Orders.status, func.count())
+                .group_by(day, Orders.product_id, Orders.status),
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+
+order_stats = CRUDOrderStats()
@@ -0,0 +1,97 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+MAX_PAGE_SIZE = 100
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+        values = [_decode_value(v) for v in values]
+        for key, value in zip(keys, values):
+            # bool is an int to isinstance, but never a sort key value
+            if isinstance(value, bool) or not isinstance(value, key.type.python_type):
+                raise ValueError(f"cursor value for {key.key} has the wrong type")
+        return values
+    except (ValueError, TypeError, KeyError, InvalidOperation, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[InstrumentedAttribute],
+    descending: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Order stmt by keys (an indexed column, then the id tiebreaker) and return one page.
+
+    With a cursor the page starts right after the row it encodes, so the cost does
+    not depend on how deep the page is; skip is only honoured without a cursor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = stmt.order_by(*(key.desc() if descending else key.asc() for key in keys))
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            left, right = keys[0], values[0]
+        else:
+            left, right = tuple_(*keys), tuple_(*values)
+        stmt = stmt.where(left < right if descending else left > right)
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    result = await db.scalars(stmt.limit(limit + 1))
+    items = list(result.all())
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], key.key) for key in keys])
+    return Page(items=items, next_cursor=next_cursor)
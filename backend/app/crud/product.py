@@ -1,87 +1,209 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException, status
-from app.models.products import Product  
-from app.models.schemas.product import ProductCreate, ProductUpdate, Product
-from typing import Optional, List
+from sqlalchemy import Boolean, Select, select, func, cast, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import immediateload, joinedload, selectinload
+from app.models.products import Product, SEARCH_CONFIG
+from app.models.schemas.product import ProductCreate, ProductUpdate, Product as ProductOut
+from app.core.cache import catalog_cache
+from app.core.conditional import make_validators
+from app.crud.base import CRUDBase
+from app.crud.pagination import MAX_PAGE_SIZE, Page, paginate
+from typing import Optional, List, Tuple
+from functools import cached_property
+from decimal import Decimal
+from datetime import datetime
 
 
-class CRUDProducts:
-    def get_all_products(
-        self, db: Session, skip: int = 0, limit: int = 100
+class CRUDProducts(CRUDBase[Product]):
+    @cached_property
+    def load_options(self):
+        # Loader strategies matching schemas.Product: the many-to-one category is joined
+        # into the main query, the images collection costs one more SELECT per page.
+        # Built on first use, creating them configures all mappers (warmed up in app.main)
+        return (joinedload(Product.category), selectinload(Product.images))
+
+    @cached_property
+    def returning_options(self):
+        return (immediateload(Product.category), selectinload(Product.images))
+
+    # Keyset for each sort option, name is unique so it needs no id tiebreaker
+    sort_keys = {
+        "name": (Product.name,),
+        "price": (Product.price, Product.id),
+        "created_at": (Product.created_at, Product.id),
+    }
+
+    async def get_all_products(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        category_id: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        name_prefix: Optional[str] = None,
+        sort: str = "name",
+        descending: bool = False,
+    ) -> Page[Product]:
+        stmt = select(Product).options(*self.load_options)
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
+        if min_price is not None:
+            stmt = stmt.where(Product.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Product.price <= max_price)
+        if name_prefix:
+            stmt = stmt.where(Product.name.startswith(name_prefix, autoescape=True))
+        return await paginate(
+            db,
+            stmt,
+            self.sort_keys[sort],
+            descending=descending,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def search(
+        self, db: AsyncSession, q: str, skip: int = 0, limit: int = 20
     ) -> List[Product]:
-        return db.query(Product).offset(skip).limit(min(limit, 100)).all()
+        """Full-text match on name/description (GIN on search_vector) or a fuzzy
+        word match on name (trigram GIN), best ranked first. Postgres only."""
+        return list(await db.scalars(self.search_query(q, skip, limit)))
+
+    def search_query(self, q: str, skip: int = 0, limit: int = 20) -> Select:
+        # The SELECT of search(), benchmarks/product_search.py explains it
+        search_vector = literal_column("products.search_vector")
+        query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+        term = literal(q)
+        return (
+            select(Product)
+            .options(*self.load_options)
+            .where(or_(search_vector.op("@@")(query), term.op("<%")(Product.name)))
+            .order_by(
+                func.ts_rank(search_vector, query).desc(),
+                func.word_similarity(term, Product.name).desc(),
+                Product.id,
+            )
+            .offset(skip)
+            .limit(max(1, min(limit, MAX_PAGE_SIZE)))
+        )
 
-    def get(self, db: Session, product_id: int) -> Optional[Product]:
-        return db.query(Product).filter(Product.id == product_id).first()
+    def validators(self, db_product: Product) -> Tuple[str, Optional[datetime]]:
+        # The response embeds the category and images, so their stamps count too
+        return make_validators(
+            (
+                "product",
+                db_product.id,
+                db_product.updated_at,
+                db_product.category.id,
+                db_product.category.updated_at,
+                tuple((image.id, image.updated_at) for image in db_product.images),
+            ),
+            [db_product.updated_at, db_product.category.updated_at]
+            + [image.updated_at for image in db_product.images],
+        )
 
-    def create(
-        self, db: Session, product_in: ProductCreate, created_by: Optional[int] = None
+    async def get_cached(
+        self, db: AsyncSession, product_id: int
+    ) -> Optional[Tuple[dict, str, Optional[datetime]]]:
+        """schemas.Product as a dict with its ETag and Last-Modified, read through catalog_cache"""
+        key = f"product:{product_id}"
+        # The version is read before the database, see VersionedCache
+        version, entry = await catalog_cache.get(key)
+        if entry is None:
+            db_product = await self.get(db, product_id)
+            if not db_product:
+                return None
+            etag, last_modified = self.validators(db_product)
+            entry = {
+                "data": ProductOut.model_validate(db_product).model_dump(mode="json"),
+                "etag": etag,
+                "last_modified": last_modified.isoformat() if last_modified else None,
+            }
+            await catalog_cache.set(key, version, entry)
+        last_modified = entry["last_modified"]
+        return entry["data"], entry["etag"], datetime.fromisoformat(last_modified) if last_modified else None
+
+    async def create(
+        self, db: AsyncSession, product_in: ProductCreate, created_by: Optional[int] = None
     ) -> Product:
-        try:
-            db_product = Product(
-                name=product_in.name,
-                description=product_in.description,
-                price=product_in.price,
-                category_id=product_in.category_id,
-                created_by=created_by,
-                updated_by=created_by,
-            )
-            db.add(db_product)
-            db.commit()
-            db.refresh(db_product)
-            return db_product
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Product with this name already exists or invalid category_id",
+        return await self._insert(
+            db,
+            {
+                "name": product_in.name,
+                "description": product_in.description,
+                "price": product_in.price,
+                "category_id": product_in.category_id,
+                "created_by": created_by,
+                "updated_by": created_by,
+            },
+            detail="Product with this name already exists or invalid category_id",
+        )
+
+    async def bulk_upsert(
+        self, db: AsyncSession, rows: List[dict], updated_by: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """One multi-row INSERT ... ON CONFLICT (name) DO UPDATE, committed.
+        Names must be unique within rows. Returns (created, updated)."""
+        if db.bind.dialect.name == "postgresql":
+            upsert = pg_insert
+            created = literal_column("xmax = 0", Boolean)  # xmax is 0 for fresh rows
+        else:
+            # SQLite (tests) has no xmax: fresh rows are the names not there before
+            upsert = sqlite_insert
+            existing = list(
+                await db.scalars(select(Product.name).where(Product.name.in_([row["name"] for row in rows])))
             )
+            created = Product.name.not_in(existing)
+        stmt = upsert(Product).values(
+            [{**row, "created_by": updated_by, "updated_by": updated_by} for row in rows]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.name],
+            set_={
+                "description": stmt.excluded.description,
+                "price": stmt.excluded.price,
+                "category_id": stmt.excluded.category_id,
+                "updated_by": stmt.excluded.updated_by,
+                "updated_at": func.now(),
+            },
+        ).returning(Product.id, created)
+        result = (await db.execute(stmt)).all()
+        await db.commit()
+        updated_ids = [product_id for product_id, created in result if not created]
+        await catalog_cache.invalidate(*(f"product:{product_id}" for product_id in updated_ids))
+        return len(result) - len(updated_ids), len(updated_ids)
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         product_id: int,
         product_in: ProductUpdate,
         updated_by: Optional[int] = None,
     ) -> Optional[Product]:
-        db_product = self.get(db, product_id)
-        if not db_product:
-            return None
-        try:
-            if product_in.name is not None:
-                db_product.name = product_in.name
-            if product_in.description is not None:
-                db_product.description = product_in.description
-            if product_in.price is not None:
-                db_product.price = product_in.price
-            if product_in.category_id is not None:
-                db_product.category_id = product_in.category_id
-            db_product.updated_by = updated_by
-            db.commit()
-            db.refresh(db_product)
-            return db_product
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Product with this name already exists or invalid category_id",
-            )
+        values = product_in.model_dump(
+            include={"name", "description", "price", "category_id"}, exclude_none=True
+        )
+        db_product = await self._update(
+            db,
+            product_id,
+            {**values, "updated_by": updated_by},
+            detail="Product with this name already exists or invalid category_id",
+        )
+        if db_product:
+            await catalog_cache.invalidate(f"product:{product_id}")
+        return db_product
 
-    def delete(self, db: Session, product_id: int) -> bool:
-        db_product = self.get(db, product_id)
+    async def delete(self, db: AsyncSession, product_id: int) -> bool:
+        db_product = await self._delete(
+            db, product_id, detail="Cannot delete product with associated orders or images"
+        )
         if not db_product:
             return False
-        try:
-            db.delete(db_product)
-            db.commit()
-            return True
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot delete product with associated orders or images",
-            )
-
+        await catalog_cache.invalidate(f"product:{product_id}")
+        return True
 
-products = CRUDProducts()
+products = CRUDProducts(Product)
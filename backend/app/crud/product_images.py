@@ -1,83 +1,72 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.product_images import ProductImages
 from app.models.schemas.product_image import ProductImage as ProductImageCreate
-from typing import Optional, List
+from app.crud.base import CRUDBase
+from app.crud.pagination import Page, paginate
+from app.core.cache import catalog_cache
+from typing import Optional
 
 
-class CRUDProductImage:
-    def get_all_images(
-        self, db: Session, skip: int = 0, limit: int = 100
-    ) -> List[ProductImages]:
-        return db.query(ProductImages).offset(skip).limit(min(limit, 100)).all()
+class CRUDProductImage(CRUDBase[ProductImages]):
+    async def get_all_images(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[ProductImages]:
+        return await paginate(
+            db, select(ProductImages), [ProductImages.id], skip=skip, limit=limit, cursor=cursor
+        )
 
-    def get(self, db: Session, image_id: int) -> Optional[ProductImages]:
-        return db.query(ProductImages).filter(ProductImages.id == image_id).first()
-
-    def create(
+    async def create(
         self,
-        db: Session,
+        db: AsyncSession,
         image_in: ProductImageCreate,
         created_by: Optional[int] = None,
     ) -> ProductImages:
-        try:
-            db_image = ProductImages(
-                url=image_in.url,
-                product_id=image_in.product_id,
-                created_by=created_by,
-                updated_by=created_by,
-            )
-            db.add(db_image)
-            db.commit()
-            db.refresh(db_image)
-            return db_image
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Image with this URL already exists",
-            )
+        db_image = await self._insert(
+            db,
+            {
+                "image_url": image_in.image_url,
+                "product_id": image_in.product_id,
+                "created_by": created_by,
+                "updated_by": created_by,
+            },
+            detail="Image with this URL already exists",
+        )
+        # Cached products embed their images
+        await catalog_cache.invalidate(f"product:{db_image.product_id}")
+        return db_image
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         image_id: int,
         image_in: ProductImageCreate,
         updated_by: Optional[int] = None,
     ) -> Optional[ProductImages]:
-        db_image = self.get(db, image_id)
+        values = {"updated_by": updated_by}
+        if image_in.image_url is not None:
+            values["image_url"] = image_in.image_url
+        old_product_id = None
+        if image_in.product_id is not None:
+            # Moving to another product stales both cached products
+            old_product_id = await db.scalar(
+                select(ProductImages.product_id).where(ProductImages.id == image_id)
+            )
+            values["product_id"] = image_in.product_id
+        db_image = await self._update(db, image_id, values, detail="Image with this URL already exists")
         if not db_image:
             return None
-        try:
-            if image_in.url is not None:
-                db_image.url = image_in.url
-            if image_in.product_id is not None:
-                db_image.product_id = image_in.product_id
-            db_image.updated_by = updated_by
-            db.commit()
-            db.refresh(db_image)
-            return db_image
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Image with this URL already exists",
-            )
+        await catalog_cache.invalidate(
+            *{f"product:{product_id}" for product_id in (old_product_id, db_image.product_id) if product_id}
+        )
+        return db_image
 
-    def delete(self, db: Session, image_id: int) -> bool:
-        db_image = self.get(db, image_id)
+    async def delete(self, db: AsyncSession, image_id: int) -> bool:
+        db_image = await self._delete(db, image_id, detail="Cannot delete image with associated products")
         if not db_image:
             return False
-        try:
-            db.delete(db_image)
-            db.commit()
-            return True
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot delete image with associated products",
-            )
+        await catalog_cache.invalidate(f"product:{db_image.product_id}")
+        return True
+
 
-product_images = CRUDProductImage()
\ No newline at end of file
+product_images = CRUDProductImage(ProductImages)
@@ -0,0 +1,177 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.product import products
+from app.models.categories import Category
+from app.models.schemas.product import ProductCreate
+
+# Upload media types accepted by the product import endpoint
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    # First IMPORT_MAX_ERRORS failures, failed counts all of them
+    errors: List[dict] = field(default_factory=list)
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+
+def import_format(content_type: Optional[str]) -> str:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload must be one of: {', '.join(IMPORT_FORMATS)}",
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines without holding more than one line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(pending) > settings.IMPORT_MAX_RECORD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Lines are limited to {settings.IMPORT_MAX_RECORD_BYTES} bytes",
+                )
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload is not valid UTF-8")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """(row, dict or error message) for each CSV record after the header row"""
+    header = None
+    record = None
+    row = 0
+    async for line in lines:
+        record = line if record is None else f"{record}\n{line}"
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            if len(record) > settings.IMPORT_MAX_RECORD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Records are limited to {settings.IMPORT_MAX_RECORD_BYTES} bytes",
+                )
+            continue
+        values = next(csv.reader([record]), [])
+        record = None
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} fields, got {len(values)}"
+        else:
+            # Empty CSV cells are missing values
+            yield row, {key: value for key, value in zip(header, values) if value != ""}
+    if record is not None:
+        yield row + 1, "Unterminated quoted field"
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """(row, dict or error message) for each non-blank line"""
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, f"Invalid JSON: {e.msg}"
+            continue
+        yield row, value if isinstance(value, dict) else "Expected a JSON object"
+
+
+async def import_products(
+    db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str, user_id: Optional[int] = None
+) -> ImportReport:
+    """Validate rows against ProductCreate as they stream in and upsert them on name
+    in batches of IMPORT_BATCH_SIZE, each batch committed on its own"""
+    report = ImportReport()
+    category_ids = set(await db.scalars(select(Category.id)))
+    # Keyed by name, bulk_upsert needs the names of one statement to be unique
+    batch: Dict[str, Tuple[int, dict]] = {}
+
+    async def upsert(rows: List[Tuple[int, dict]]) -> None:
+        created, updated = await products.bulk_upsert(
+            db, [values for _, values in rows], updated_by=user_id
+        )
+        report.created += created
+        report.updated += updated
+
+    async def flush():
+        rows = list(batch.values())
+        batch.clear()
+        try:
+            await upsert(rows)
+        except DBAPIError:
+            await db.rollback()
+            # One bad row fails the whole statement, retry one by one to find it
+            for row, values in rows:
+                try:
+                    await upsert([(row, values)])
+                except DBAPIError as e:
+                    await db.rollback()
+                    report.error(row, f"Rejected by the database: {e.orig}")
+
+    records = iter_csv_records if fmt == "csv" else iter_ndjson_records
+    async for row, record in records(iter_lines(chunks)):
+        report.rows += 1
+        if isinstance(record, str):
+            report.error(row, record)
+            continue
+        try:
+            product = ProductCreate.model_validate(record)
+        except ValidationError as e:
+            report.error(
+                row,
+                "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            )
+            continue
+        if product.category_id not in category_ids:
+            report.error(row, f"category_id: {product.category_id} does not exist")
+            continue
+        if product.name in batch:
+            report.error(row, f"name: {product.name!r} already in row {batch[product.name][0]}")
+            continue
+        batch[product.name] = (row, product.model_dump())
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return report
@@ -1,13 +1,23 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import DatabaseError, IntegrityError
 from fastapi import HTTPException, status
 from app.models.user import User, UserRole, UserStatus
+from app.models.categories import Category
+from app.models.orders import Orders
+from app.models.product_images import ProductImages
+from app.models.products import Product
 from app.models.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
-from typing import Optional, List
+from app.core.security import password_hasher
+from app.core.cache import principal_cache
+from app.crud.base import CRUDBase
+from app.crud.pagination import Page, paginate
+from app.core.conditional import make_validators
+from typing import Optional, List, Tuple
+from datetime import datetime
 
 
-class CRUDUser:
+class CRUDUser(CRUDBase[User]):
     # def authenticate(db: Session, email: str, password: str):
         # try:
         #     user = db.query(User).filter(User.email == email).first()
@@ -40,112 +50,121 @@ class CRUDUser:
         #         detail="An unexpected error occurred",
         #     )
 
-    def authenticate(self, db: Session, email: str, password: str) -> Optional[User]:
-        user = self.get_by_email(db, email=email)
-        if not user or not verify_password(password, user.hashed_password):
+    async def authenticate(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        # bcrypt runs in the password hashing process pool
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
         return user
 
-    def get_all_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-        return db.query(User).offset(skip).limit(min(limit, 100)).all()
+    async def get_all_users(
+        self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[User]:
+        return await paginate(db, select(User), [User.id], skip=skip, limit=limit, cursor=cursor)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.email == email))
 
-    def get_by_email(self, db: Session, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+    def validators(self, db_user: User) -> Tuple[str, Optional[datetime]]:
+        return make_validators(("user", db_user.id, db_user.updated_at), [db_user.updated_at])
 
-    def get(self, db: Session, user_id: int) -> Optional[User]:
-        return db.query(User).filter(User.id == user_id).first()
+    # Nullable references to a user, cleared when it is deleted as the ORM delete did
+    # through the relationships (the schema has no ON DELETE SET NULL)
+    audit_columns = (
+        User.created_by,
+        User.updated_by,
+        Category.created_by,
+        Category.updated_by,
+        Product.created_by,
+        Product.updated_by,
+        ProductImages.created_by,
+        ProductImages.updated_by,
+        Orders.approved_by,
+        Orders.cancelled_by,
+    )
 
-    def create(
-        self, db: Session, user_in: UserCreate, created_by: Optional[int] = None
+    async def create(
+        self, db: AsyncSession, user_in: UserCreate, created_by: Optional[int] = None
     ) -> User:
-        try:
-            hashed_password = get_password_hash(user_in.password)
-            db_user = User(
-                email=user_in.email,
-                first_name=user_in.first_name,
-                last_name=user_in.last_name,
-                phone_number=user_in.phone_number,
-                hashed_password=hashed_password,
-                created_by=created_by,
-                updated_by=created_by,
-            )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email or phone number already exists",
-            )
+        hashed_password = await password_hasher.hash(user_in.password)
+        return await self._insert(
+            db,
+            {
+                "email": user_in.email,
+                "first_name": user_in.first_name,
+                "last_name": user_in.last_name,
+                "phone_number": user_in.phone_number,
+                "hashed_password": hashed_password,
+                "created_by": created_by,
+                "updated_by": created_by,
+            },
+            detail="Email or phone number already exists",
+        )
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         user_in: UserCreate,
         updated_by: Optional[int] = None,
     ) -> Optional[User]:
-        db_user = self.get(db, user_id)
-        if not db_user:
+        # The principal cache is keyed by email, the old one must go too
+        old_email = await db.scalar(select(User.email).where(User.id == user_id))
+        if old_email is None:
             return None
-        try:
-            db_user.email = user_in.email
-            db_user.first_name = user_in.first_name
-            db_user.last_name = user_in.last_name
-            db_user.phone_number = user_in.phone_number
-            db_user.hashed_password = get_password_hash(user_in.password)
-            db_user.updated_by = updated_by
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email or phone number already exists",
-            )
+        db_user = await self._update(
+            db,
+            user_id,
+            {
+                "email": user_in.email,
+                "first_name": user_in.first_name,
+                "last_name": user_in.last_name,
+                "phone_number": user_in.phone_number,
+                "hashed_password": await password_hasher.hash(user_in.password),
+                "updated_by": updated_by,
+            },
+            detail="Email or phone number already exists",
+        )
+        if db_user:
+            await principal_cache.invalidate(old_email, db_user.email)
+        return db_user
 
-    def delete(self, db: Session, user_id: int) -> bool:
-        db_user = self.get(db, user_id)
+    async def delete(self, db: AsyncSession, user_id: int) -> bool:
+        for column in self.audit_columns:
+            await db.execute(
+                update(column.table).where(column == user_id).values({column.key: None})
+            )
+        db_user = await self._delete(db, user_id)
         if not db_user:
+            await db.rollback()
             return False
-        db.delete(db_user)
-        db.commit()
+        await principal_cache.invalidate(db_user.email)
         return True
 
-    def update_status(
+    async def update_status(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         status: UserStatus,
         updated_by: Optional[int] = None,
     ) -> Optional[User]:
-        db_user = self.get(db, user_id)
-        if not db_user:
-            return None
-        db_user.status = status
-        db_user.updated_by = updated_by
-        db.commit()
-        db.refresh(db_user)
+        db_user = await self._update(db, user_id, {"status": status, "updated_by": updated_by})
+        if db_user:
+            await principal_cache.invalidate(db_user.email)
         return db_user
 
-    def update_role(
+    async def update_role(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         role: UserRole,
         updated_by: Optional[int] = None,
     ) -> Optional[User]:
-        db_user = self.get(db, user_id)
-        if not db_user:
-            return None
-        db_user.role = role
-        db_user.updated_by = updated_by
-        db.commit()
-        db.refresh(db_user)
+        db_user = await self._update(db, user_id, {"role": role, "updated_by": updated_by})
+        if db_user:
+            await principal_cache.invalidate(db_user.email)
         return db_user
 
-
-user = CRUDUser()
+user = CRUDUser(User)
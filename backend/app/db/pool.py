@@ -0,0 +1,43 @@
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that counts checkouts and the time spent waiting for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_time_total_ms": round(self.total_wait * 1000, 3),
+            "wait_time_avg_ms": round(self.total_wait * 1000 / self.checkouts, 3)
+            if self.checkouts
+            else 0.0,
+            "wait_time_max_ms": round(self.max_wait * 1000, 3),
+        }
@@ -0,0 +1,108 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse bind placeholders so IN lists of any length share one shape"""
+    return _PLACEHOLDER_LIST.sub("(?)", _PLACEHOLDER.sub("?", statement))
+
+
+class QueryStats:
+    """SQL statements issued while it is the current tracker"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements run in this context, e.g. to assert a query budget in tests"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_start_time)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    # SQLAlchemy copies the caller's context into its greenlets, so _current resolves here
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Reports statement count and DB time per request in Server-Timing and
+    X-DB-Query-Count, and warns when one statement shape repeats (N+1)"""
+
+    def __init__(self, app, repeat_threshold: int = settings.QUERY_REPEAT_WARN_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append(
+                        (
+                            b"server-timing",
+                            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'.encode(),
+                        )
+                    )
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                for shape, n in stats.repeated(self.repeat_threshold):
+                    logger.warning(
+                        "Possible N+1: %s %s ran %d times: %s",
+                        scope["method"],
+                        scope["path"],
+                        n,
+                        shape,
+                    )
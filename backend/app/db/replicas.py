@@ -0,0 +1,114 @@
+import itertools
+import time
+from collections import Counter
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from app.core.cache import make_cache_backend
+from app.core.config import settings
+from app.core.security import verify_token
+from app.db.session import SessionLocal, make_engine, make_sessionmaker
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """The subject of a valid bearer token, None for anonymous requests"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = verify_token(token)
+    return payload.get("sub") if payload else None
+
+
+class ReplicaRouter:
+    """Picks the session factory for a read-only request: the replicas round-robin,
+    or the primary when there are none or the user wrote recently (read-your-writes).
+    The deadlines live on the server, keyed by token subject, in pins: a backend
+    shared by every worker when given a redis:// URL."""
+
+    def __init__(
+        self, primary: async_sessionmaker, replica_engines: List[AsyncEngine], stick_seconds: float, pins
+    ):
+        self.primary = primary
+        self.engines = replica_engines
+        self.replicas = [make_sessionmaker(replica_engine) for replica_engine in replica_engines]
+        self.stick_seconds = stick_seconds
+        self.pins = pins
+        self._cycle = itertools.cycle(self.replicas)
+        self.reads = Counter()
+
+    async def pin(self, subject: str) -> None:
+        await self.pins.set(f"primary_until:{subject}", time.time() + self.stick_seconds)
+
+    async def wants_primary(self, request: Request) -> bool:
+        subject = token_subject(request.headers.get("authorization"))
+        if subject is None:
+            return False
+        return (await self.pins.get(f"primary_until:{subject}") or 0) > time.time()
+
+    async def session_factory(self, request: Request) -> async_sessionmaker:
+        if not self.replicas or await self.wants_primary(request):
+            self.reads["primary"] += 1
+            return self.primary
+        self.reads["replica"] += 1
+        return next(self._cycle)
+
+    async def dispose(self) -> None:
+        for replica_engine in self.engines:
+            await replica_engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "reads": dict(self.reads),
+            "replicas": [
+                {"host": replica_engine.url.host, **replica_engine.pool.stats()} for replica_engine in self.engines
+            ],
+        }
+
+
+read_router = ReplicaRouter(
+    SessionLocal,
+    [make_engine(url) for url in settings.REPLICA_DATABASE_URLS],
+    settings.DB_READ_YOUR_WRITES_SECONDS,
+    make_cache_backend(
+        settings.DB_READ_YOUR_WRITES_CACHE_URL,
+        maxsize=settings.DB_READ_YOUR_WRITES_CACHE_SIZE,
+        ttl=settings.DB_READ_YOUR_WRITES_SECONDS,
+    ),
+)
+
+
+# Dependency for read-only endpoints, may lag the primary by the replication delay
+async def get_read_db(request: Request):
+    async with (await read_router.session_factory(request))() as db:
+        yield db
+
+
+# Read-only streaming bodies, see get_session_factory
+async def get_read_session_factory(request: Request) -> async_sessionmaker:
+    return await read_router.session_factory(request)
+
+
+class ReadYourWritesMiddleware:
+    """Pins the token subject of a successful write to the primary, so that user's
+    reads in the next stick_seconds see the write instead of a lagging replica.
+    Anonymous writes are not tracked."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = dict(scope["headers"])
+                subject = token_subject(headers.get(b"authorization", b"").decode("latin-1"))
+                if subject is not None:
+                    await read_router.pin(subject)
+            await send(message)
+
+        await self.app(scope, receive, send_and_pin)
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Optional, Tuple
+from sqlalchemy import Column, Sequence, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class BlockSequence:
+    """Hands out numbers from blocks reserved with one nextval() each.
+
+    Every nextval() reserves [value, value + block_size) for this process, where
+    block_size is the INCREMENT BY of the database sequence, read before the first
+    reservation. Numbers left in a block when the process exits are never used:
+    values are unique and increasing, not gapless.
+    """
+
+    def __init__(self, sequence: Sequence, column: Column):
+        self.sequence = sequence
+        self.column = column
+        self.block_size: Optional[int] = None
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def next(self, db: AsyncSession) -> int:
+        async with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = await self._reserve(db)
+            value = self._next
+            self._next += 1
+            return value
+
+    async def check(self, db: AsyncSession) -> None:
+        """Read the block size from the database, raises RuntimeError when it is not
+        the configured increment (e.g. the setting changed without ALTER SEQUENCE).
+        Called before the first reservation, so a mismatch fails the first order
+        instead of handing out overlapping numbers; check-sequences runs it at deploy."""
+        if not db.bind.dialect.supports_sequences:
+            return
+        name = self.sequence.name
+        increment = await db.scalar(
+            text(
+                "SELECT increment_by FROM pg_sequences "
+                "WHERE schemaname = current_schema() AND sequencename = :name"
+            ),
+            {"name": name},
+        )
+        if increment is None:
+            raise RuntimeError(f"Sequence {name} does not exist, run alembic upgrade head")
+        if increment != (self.sequence.increment or 1):
+            # Workers with different block sizes would hand out overlapping numbers
+            raise RuntimeError(
+                f"Sequence {name} increments by {increment} in the database "
+                f"but by {self.sequence.increment} in the settings"
+            )
+        self.block_size = increment
+
+    async def _reserve(self, db: AsyncSession) -> Tuple[int, int]:
+        if db.bind.dialect.supports_sequences:
+            if self.block_size is None:
+                await self.check(db)
+            start = await db.scalar(select(self.sequence.next_value()))
+            return start, start + self.block_size
+        # SQLite (tests) has no sequences, take the next free number without a block
+        start = await db.scalar(select(func.coalesce(func.max(self.column), 0) + 1))
+        return start, start + 1
@@ -1,25 +1,55 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool
+from app.db.query_stats import instrument_engine
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Checks connection before using
-    echo=True,  # Set to False in production
-)
+
+def make_engine(url: str) -> AsyncEngine:
+    """Engine with the configured pool, used for the primary and each read replica"""
+    new_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
+    )
+    # Per-request statement counts, reported by QueryStatsMiddleware
+    if settings.QUERY_STATS_ENABLED:
+        instrument_engine(new_engine)
+    return new_engine
+
+
+def make_sessionmaker(bind: AsyncEngine) -> async_sessionmaker:
+    # expire_on_commit=False keeps loaded attributes after commit, lazy loads are
+    # not possible on asyncio so the response is built from what is already loaded
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+# Create database engine (asyncpg driver)
+engine = make_engine(settings.ASYNC_DATABASE_URL)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = make_sessionmaker(engine)
 
 # Base class for models
 Base = declarative_base()
 
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Streaming bodies run after dependency sessions are closed and open their own
+def get_session_factory() -> async_sessionmaker:
+    return SessionLocal
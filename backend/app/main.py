@@ -1,18 +1,23 @@
 # main.py (or app/main.py)
 from fastapi import FastAPI
-from sqlalchemy.exc import DatabaseError, IntegrityError
-from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DatabaseError
+from sqlalchemy.orm import configure_mappers
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi import status
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.session import engine, Base, SessionLocal
-from app.models.user import User
-from app.models.schemas.user import UserCreate
-from app.crud.user import user as user_crud
-from app.core.security import get_password_hash
+from app.db.session import engine
+from app.db.replicas import ReadYourWritesMiddleware, read_router
+from app.core import security
+from app.core.security import password_hasher
 from app.core.cors import setup_cors
+from app.core.cache import principal_cache, catalog_cache
+from app.core.pubsub import message_broker
+from app.db.query_stats import QueryStatsMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.admission import AdmissionControlMiddleware, admission, configure_threadpool
 
 import logging
 
@@ -22,23 +27,48 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create tables and default user
-    Base.metadata.create_all(bind=engine)
-    create_default_user()
+    # Startup does no DDL and no hashing: the schema is managed by Alembic
+    # (alembic upgrade head) and the admin by `python -m app.cli create-default-user`.
+    # What importing the app leaves lazy is loaded here, before the first request.
+    configure_mappers()
+    security.warm_up()
+    configure_threadpool(settings.THREADPOOL_SIZE)
+    # No query either: the order number sequence is checked on its first use
+    # (and at deploy time by `python -m app.cli check-sequences`)
     yield
-    # Shutdown: Clean up resources if needed
-    pass
+    # Shutdown: Release pooled connections, hashing workers and the message broker
+    password_hasher.shutdown()
+    await message_broker.close()
+    await read_router.dispose()
+    await engine.dispose()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,  # Use lifespan instead of startup event
+    default_response_class=ORJSONResponse,  # orjson instead of the stdlib encoder
 )
 
+# Per route class concurrency limits, innermost so shed requests still get CORS headers
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Setup CORS first (important!)
 setup_cors(app)
 
+# SQL statement count and DB time per request
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Reads stick to the primary for a while after the client's writes
+if settings.REPLICA_DATABASE_URLS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# gzip/brotli, added last so it wraps everything else
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # Include the API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -52,49 +82,8 @@ async def database_error_handler(request, exc: DatabaseError):
     )
 
 
-def create_default_user():
-    """Create default admin user if none exists"""
-    db = SessionLocal()
-    try:
-        # Check if any users exist
-        if not db.query(User).first():
-            # Create default user
-            default_user_data = UserCreate(
-                email="admin@example.com",
-                first_name="Biness",
-                last_name="Chama",
-                phone_number="0965508033",
-                password="adminpassword",
-            )
-
-            # Use your CRUD function to create user
-            user = user_crud.create(db, obj_in=default_user_data)
-
-            # Set additional fields if needed
-            user.status = "ACTIVE"
-            user.role = "ADMIN"
-
-            db.commit()
-            db.refresh(user)
-            print("✅ Default admin user created:")
-            print(f"   Email: admin@example.com")
-            print(f"   Password: adminpassword")
-
-    except IntegrityError as e:
-        db.rollback()
-        print(
-            "⚠️  Default user creation skipped: User already exists or integrity error"
-        )
-        print(f"   Error: {e}")
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Error creating default user: {e}")
-    finally:
-        db.close()
-
-
 @app.get("/")
-def root():
+async def root():
     return {
         "message": "Welcome to B2B Platform API",
         "status": "Database connected successfully",
@@ -104,11 +93,18 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {
         "status": "healthy",
         "environment": settings.ENVIRONMENT,
         "cors_origins": settings.CORS_ORIGINS,
+        "database_pool": engine.pool.stats(),
+        "database_replicas": read_router.stats(),
+        "principal_cache": principal_cache.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "message_broker": message_broker.stats(),
+        "admission": admission.stats(),
     }
 
 
@@ -4,6 +4,8 @@ from .categories import Category
 from .products import Product
 from .product_images import ProductImages
 from .orders import Orders
+from .order_stats import OrderStats
 from .messages import Messages
+from .message_threads import MessageThreads
 
-__all__ = ["User", "Category", "Product", "Messages", "Orders", "ProductImages"]
\ No newline at end of file
+__all__ = ["User", "Category", "Product", "Messages", "MessageThreads", "Orders", "OrderStats", "ProductImages"]
\ No newline at end of file
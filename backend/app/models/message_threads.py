@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+
+class MessageThreads(Base):
+    """One row per user and counterpart: the latest message of their conversation and
+    how many the user has not read, kept in step with messages by CRUDMessages (see
+    crud.message_threads), rebuilt by app.cli"""
+
+    __tablename__ = "message_threads"
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    counterpart_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # No foreign key: a deleted message is replaced here in the same transaction
+    last_message_id = Column(Integer, nullable=False)
+    last_message_at = Column(DateTime, nullable=False)
+    unread = Column(Integer, nullable=False, default=0)  # Messages from counterpart not read yet
+
+    counterpart = relationship("User", foreign_keys=[counterpart_id])
+    last_message = relationship(
+        "Messages", primaryjoin="foreign(MessageThreads.last_message_id) == Messages.id", viewonly=True
+    )
+
+    # Keyset pagination of a user's conversations, newest first (see CRUDMessages.get_threads)
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "counterpart_id"),
+        Index("ix_message_threads_user_recent", "user_id", "last_message_at", "counterpart_id"),
+    )
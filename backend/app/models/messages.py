@@ -1,16 +1,61 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
+# least()/greatest() of two user ids, not registered with func so other code is unaffected
+class _Least(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+class _Greatest(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+@compiles(_Least)
+def _least(element, compiler, **kw):
+    return f"least({compiler.process(element.clauses, **kw)})"
+
+@compiles(_Greatest)
+def _greatest(element, compiler, **kw):
+    return f"greatest({compiler.process(element.clauses, **kw)})"
+
+# SQLite (tests) spells them as the multi-argument min()/max()
+@compiles(_Least, "sqlite")
+def _least_sqlite(element, compiler, **kw):
+    return f"min({compiler.process(element.clauses, **kw)})"
+
+@compiles(_Greatest, "sqlite")
+def _greatest_sqlite(element, compiler, **kw):
+    return f"max({compiler.process(element.clauses, **kw)})"
+
+def conversation_key(first, second):
+    """The unordered pair of two user ids, the leading columns of ix_messages_conversation"""
+    return _Least(first, second), _Greatest(first, second)
+
 class Messages(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
     message = Column(String(1000), nullable=False)
-    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date_time_sent = Column(DateTime, nullable=False, server_default=func.now())
+    read_at = Column(DateTime, nullable=True)  # Set when the receiver opens the thread
 
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
-    receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
\ No newline at end of file
+    receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
+
+    # Keyset pagination of sent/received lists (newest first), and conversations
+    # keyed on the unordered user pair (see CRUDMessages.get_thread)
+    __table_args__ = (
+        Index("ix_messages_sender_id_id", "sender_id", "id"),
+        Index("ix_messages_receiver_id_id", "receiver_id", "id"),
+        Index(
+            "ix_messages_conversation",
+            *conversation_key(sender_id, receiver_id),
+            date_time_sent,
+        ),
+    )
\ No newline at end of file
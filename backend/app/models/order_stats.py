@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Date, PrimaryKeyConstraint
+from sqlalchemy.sql.sqltypes import Enum as SQLEnum
+from app.db.session import Base
+from app.models.orders import OrderStatus
+
+class OrderStats(Base):
+    """Order counts per requested day, product and status, kept in step with
+    orders by CRUDOrders (see crud.order_stats), rebuilt by app.cli"""
+
+    __tablename__ = "order_stats"
+
+    day = Column(Date, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    status = Column(SQLEnum(OrderStatus), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (PrimaryKeyConstraint("day", "product_id", "status"),)
@@ -1,15 +1,23 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import Enum as SQLEnum 
 from enum import Enum
 from app.db.session import Base
+from app.core.config import settings
 
 class OrderStatus(Enum):
     REQUEST = "REQUEST"
     APPROVED = "APPROVED"
     CANCELLED = "CANCELLED"
 
+# Each nextval() reserves a block of ORDER_NUMBER_BLOCK_SIZE order numbers (see crud.order)
+order_number_seq = Sequence(
+    "orders_order_number_seq",
+    increment=settings.ORDER_NUMBER_BLOCK_SIZE,
+    metadata=Base.metadata,
+)
+
 class Orders(Base):
     __tablename__ = "orders"
 
@@ -24,6 +32,7 @@ class Orders(Base):
     date_requested = Column(DateTime, nullable=False, server_default=func.now())
     date_approved = Column(DateTime, nullable=True)
     date_cancelled = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
     customer = relationship("User", foreign_keys=[customer_id], back_populates="orders")
     product = relationship("Product", foreign_keys=[product_id], back_populates="orders")
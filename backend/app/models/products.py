@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Index, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
+# Text search configuration of products.search_vector, queries must use the same one
+SEARCH_CONFIG = "english"
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -20,4 +23,54 @@ class Product(Base):
     images = relationship("ProductImages", back_populates="product")
     orders = relationship("Orders", back_populates="product")
     creator = relationship("User", foreign_keys=[created_by], back_populates="created_products")
-    updater = relationship("User", foreign_keys=[updated_by], back_populates="updated_products")
\ No newline at end of file
+    updater = relationship("User", foreign_keys=[updated_by], back_populates="updated_products")
+
+    # Catalog listing: filter by category, keyset on the sort column (see CRUDProducts.sort_keys)
+    __table_args__ = (
+        Index("ix_products_category_id_name", "category_id", "name"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        Index("ix_products_category_id_created_at_id", "category_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        # LIKE 'prefix%' cannot use the collation-aware ix_products_name
+        Index(
+            "ix_products_name_pattern",
+            "name",
+            postgresql_ops={"name": "varchar_pattern_ops"},
+        ),
+    )
+
+
+# Full-text search (CRUDProducts.search), Postgres only: a stored generated tsvector over
+# name (weight A) and description (weight B) with a GIN index, plus a trigram GIN index
+# on name for typo tolerance. The column is maintained by Postgres and never mapped.
+# These events cover create_all (tests, benchmarks); migrations repeat the DDL in 0002.
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+        ") STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL("CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)").execute_if(
+        dialect="postgresql"
+    ),
+)
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL("CREATE INDEX ix_products_name_trgm ON products USING gin (name gin_trgm_ops)").execute_if(
+        dialect="postgresql"
+    ),
+)
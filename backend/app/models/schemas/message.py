@@ -20,6 +20,12 @@ class Message(MessageBase):
     sender: User
     receiver: User
     date_time_sent: datetime
+    read_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class Thread(BaseModel):
+    counterpart: User
+    last_message: Message
+    unread: int  # Messages from counterpart not read yet
\ No newline at end of file
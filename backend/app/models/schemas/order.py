@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic.types import StringConstraints
-from typing import Optional, List, Annotated
-from datetime import datetime
+from typing import Dict, Optional, List, Annotated
+from datetime import date, datetime
 from enum import Enum
 
 # Enums
@@ -12,21 +12,45 @@ class OrderStatus(str, Enum):
 
 # Order Schemas
 class OrderBase(BaseModel):
-    order_number: int
     product_id: int
     customer_id: int
 
 class OrderCreate(OrderBase):
-    pass  # No additional fields needed for creation
+    pass  # order_number is allocated by the server
 
 class OrderUpdate(BaseModel):
-    order_number: Optional[int] = None
+    # order_number is not updatable, the sequence may hand the same number out later
     product_id: Optional[int] = None
     customer_id: Optional[int] = None
     status: Optional[OrderStatus] = None
 
+class OrderBatch(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class OrderBatchResult(BaseModel):
+    applied: List[int]  # Transitioned from REQUEST by this call
+    skipped: List[int]  # Exist but were no longer REQUEST
+    missing: List[int]  # No such order
+
+class ProductOrderCount(BaseModel):
+    product_id: int
+    total: int
+    by_status: Dict[OrderStatus, int]
+
+class DayOrderCount(BaseModel):
+    day: date  # Day the orders were requested
+    total: int
+    by_status: Dict[OrderStatus, int]
+
+class OrderStatsSummary(BaseModel):
+    total: int
+    by_status: Dict[OrderStatus, int]
+    by_product: List[ProductOrderCount]
+    by_day: List[DayOrderCount]
+
 class Order(OrderBase):
     id: int
+    order_number: int
     status: OrderStatus
     product: "Product"
     customer: "User"
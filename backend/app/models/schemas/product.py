@@ -1,9 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic.types import StringConstraints
 from typing import Optional, List, Annotated
 from .category import Category  # Pydantic Category
 from .product_image import ProductImage  # Corrected import
 
+# Prices written to the Numeric(10, 2) column: fit once rounded to cents, no NaN or
+# infinity. Responses keep a plain float, older rows may be outside these bounds
+Price = Annotated[float, Field(ge=0, le=99_999_999.99, allow_inf_nan=False)]
+
 class ProductBase(BaseModel):
     name: Annotated[str, StringConstraints(min_length=1, max_length=100)]
     description: Optional[Annotated[str, StringConstraints(max_length=255)]] = None
@@ -11,12 +15,12 @@ class ProductBase(BaseModel):
     category_id: int  # Added to align with SQLAlchemy model
 
 class ProductCreate(ProductBase):
-    pass
+    price: Price
 
 class ProductUpdate(ProductBase):
     name: Optional[Annotated[str, StringConstraints(min_length=1, max_length=100)]] = None
     description: Optional[Annotated[str, StringConstraints(max_length=255)]] = None
-    price: Optional[float] = None
+    price: Optional[Price] = None
     category_id: Optional[int] = None
 
 class Product(ProductBase):
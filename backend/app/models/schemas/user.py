@@ -48,6 +48,7 @@ class UserBase(BaseModel):
 
 
 class User(UserBase):
+    email: str  # Validated on the way in, not again on every response
     id: int
     status: UserStatus = UserStatus.PENDING
     role: UserRole = UserRole.USER
@@ -52,4 +52,8 @@ class User(Base):
     created_users = relationship("User", foreign_keys="User.created_by", back_populates="creator_users")
     updated_users = relationship("User", foreign_keys="User.updated_by", back_populates="updater_users")
     creator_users = relationship("User", foreign_keys=[created_by], back_populates="created_users", remote_side=[id])
-    updater_users = relationship("User", foreign_keys=[updated_by], back_populates="updated_users", remote_side=[id])
\ No newline at end of file
+    updater_users = relationship("User", foreign_keys=[updated_by], back_populates="updated_users", remote_side=[id])
+
+    @property
+    def is_active(self) -> bool:
+        return self.status not in (UserStatus.INACTIVE, UserStatus.SUSPENDED)
\ No newline at end of file
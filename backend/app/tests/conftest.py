@@ -0,0 +1,105 @@
+# conftest.py
+import asyncio
+import itertools
+import os
+
+# Settings() is instantiated at import time, provide the required values
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-123456789012345678901234567890")
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.db import session
+from app.db.session import Base
+from app.models import User
+
+# Postgres for the tests that need its features, the tables are created and dropped
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def enforce_foreign_keys(dbapi_connection, connection_record):
+    # Off by default in SQLite, Postgres always checks them
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+async def create_tables(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    """SQLite files under tmp_path with the tables created, disposed after the test.
+    NullPool: no connection outlives the asyncio.run() that opened it, unless pooled
+    asks for the app's configured pool."""
+    engines = []
+
+    def make_engine(name: str = "test", pooled: bool = False):
+        url = f"sqlite+aiosqlite:///{tmp_path}/{name}.sqlite"
+        engine = session.make_engine(url) if pooled else create_async_engine(url, poolclass=NullPool)
+        event.listen(engine.sync_engine, "connect", enforce_foreign_keys)
+        asyncio.run(create_tables(engine))
+        engines.append(engine)
+        return engine
+
+    yield make_engine
+    for engine in engines:
+        asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine()
+
+
+@pytest.fixture
+def pg_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    asyncio.run(create_tables(engine))
+    yield engine
+
+    async def drop_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    asyncio.run(drop_tables())
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def add_user(session_factory):
+    """Commits a user named "<name>@example.com" and returns it."""
+    phone_numbers = itertools.count()
+
+    async def add_user(name: str = "a", **values) -> User:
+        async with session_factory() as db:
+            user = User(
+                email=f"{name}@example.com",
+                first_name=name,
+                last_name=name,
+                phone_number=f"09{next(phone_numbers):08d}",
+                hashed_password="x",
+                **values,
+            )
+            db.add(user)
+            await db.commit()
+            return user
+
+    return add_user
+
+
+@pytest.fixture
+def user(add_user):
+    return asyncio.run(add_user())
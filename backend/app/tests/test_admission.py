@@ -0,0 +1,72 @@
+# test_admission.py
+import asyncio
+import httpx
+from fastapi import FastAPI
+from app.core.admission import AdmissionClass, AdmissionController, AdmissionControlMiddleware
+
+
+def make_controller() -> AdmissionController:
+    return AdmissionController(
+        {
+            "auth": AdmissionClass("auth", limit=1, queue_size=1),
+            "catalog": AdmissionClass("catalog", limit=4, queue_size=0),
+            "order_writes": AdmissionClass("order_writes", limit=1, queue_size=0),
+            "bulk": AdmissionClass("bulk", limit=1, queue_size=0),
+        },
+        retry_after=3,
+        prefix="/api/v1",
+    )
+
+
+def test_classify_routes():
+    controller = make_controller()
+    name = lambda method, path: getattr(controller.classify(method, path), "name", None)
+    assert name("POST", "/api/v1/auth/login-json") == "auth"
+    assert name("GET", "/api/v1/products/products/42") == "catalog"
+    assert name("POST", "/api/v1/products/products/import") == "bulk"
+    assert name("GET", "/api/v1/orders/orders/export") == "bulk"
+    assert name("POST", "/api/v1/orders/orders/approve") == "order_writes"
+    assert name("GET", "/api/v1/orders/orders/") is None
+    assert name("OPTIONS", "/api/v1/auth/login") is None  # CORS preflight
+    assert name("GET", "/api/v1/messages/messages/stream") is None
+
+
+def test_saturated_class_sheds_without_slowing_others():
+    controller = make_controller()
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        await release.wait()
+        return "token"
+
+    @app.get("/api/v1/products/products/")
+    async def products():
+        return []
+
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    auth = controller.classes["auth"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            logins = [asyncio.create_task(client.post("/api/v1/auth/login")) for _ in range(2)]
+            while auth.in_flight + auth.waiting < 2:
+                await asyncio.sleep(0)
+            # One running, one queued: the third is shed at once
+            shed = await client.post("/api/v1/auth/login")
+            assert shed.status_code == 503
+            assert shed.headers["retry-after"] == "3"
+            assert auth.stats() == {
+                "limit": 1, "queue_size": 1, "in_flight": 1, "waiting": 1, "completed": 0, "rejected": 1
+            }
+
+            # Catalog reads have their own slots
+            assert (await client.get("/api/v1/products/products/")).status_code == 200
+
+            release.set()
+            assert [response.status_code for response in await asyncio.gather(*logins)] == [200, 200]
+        assert (auth.in_flight, auth.waiting, auth.completed) == (0, 0, 2)
+
+    asyncio.run(run())
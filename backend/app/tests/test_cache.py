@@ -0,0 +1,154 @@
+# test_cache.py
+import asyncio
+import time
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from app.core.cache import MemoryCacheBackend, TTLCache, VersionedCache, catalog_cache
+from app.core.security import create_access_token
+from app.crud import categories, products, user as users
+from app.db.session import get_db
+from app.main import app
+from app.models import Category, Product
+from app.models.user import UserStatus
+from app.models.schemas.category import CategoryUpdate
+from app.models.schemas.product import ProductUpdate
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_and_counts():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 0
+
+
+def test_ttl_cache_delete():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.delete("a", "missing")
+    assert cache.get("a") is None
+
+
+def test_category_update_invalidates_cached_products(session_factory):
+    async def run():
+        async with session_factory() as db:
+            category = Category(name="tools")
+            product = Product(name="hammer", price=Decimal("9.99"), category=category)
+            db.add_all([category, product])
+            await db.commit()
+
+            cached, _, _ = await products.get_cached(db, product.id)
+            assert cached["category"]["name"] == "tools"
+            assert (await catalog_cache.get(f"product:{product.id}"))[1]["data"] == cached
+
+            await categories.update(db, category.id, CategoryUpdate(name="hardware"))
+            assert (await catalog_cache.get(f"product:{product.id}"))[1] is None
+            cached, _, _ = await products.get_cached(db, product.id)
+            assert cached["category"]["name"] == "hardware"
+        await catalog_cache.clear()
+
+    asyncio.run(run())
+
+
+def test_fill_that_raced_an_update_is_not_cached(session_factory, monkeypatch):
+    async def run():
+        async with session_factory() as db:
+            product = Product(name="hammer", price=Decimal("9.99"), category=Category(name="tools"))
+            db.add(product)
+            await db.commit()
+
+        read = products.get
+
+        async def read_then_writer_commits(db, product_id):
+            db_product = await read(db, product_id)
+            # The writer commits and invalidates after this reader loaded the old row
+            async with session_factory() as writer:
+                await products.update(writer, product_id, ProductUpdate(price=12))
+            return db_product
+
+        async with session_factory() as db:
+            monkeypatch.setattr(products, "get", read_then_writer_commits)
+            stale, _, _ = await products.get_cached(db, product.id)
+            assert stale["price"] == 9.99
+            monkeypatch.setattr(products, "get", read)
+            fresh, _, _ = await products.get_cached(db, product.id)
+            assert fresh["price"] == 12
+        await catalog_cache.clear()
+
+    asyncio.run(run())
+
+
+def test_principal_set_after_an_invalidation_is_never_read():
+    cache = VersionedCache(MemoryCacheBackend(maxsize=10, ttl=60))
+
+    async def run():
+        version, entry = await cache.get("a@example.com")
+        assert entry is None
+        # A write lands between this request's database read and its set
+        await cache.invalidate("a@example.com")
+        await cache.set("a@example.com", version, {"status": "ACTIVE"})
+        assert (await cache.get("a@example.com"))[1] is None
+
+        version, _ = await cache.get("a@example.com")
+        await cache.set("a@example.com", version, {"status": "SUSPENDED"})
+        assert (await cache.get("a@example.com"))[1] == {"status": "SUSPENDED"}
+
+    asyncio.run(run())
+
+
+def test_principal_versions_stay_out_of_the_stats():
+    cache = VersionedCache(MemoryCacheBackend(maxsize=10, ttl=60))
+
+    async def run():
+        version, entry = await cache.get("a@example.com")
+        await cache.set("a@example.com", version, {"status": "ACTIVE"})
+        for _ in range(9):
+            assert (await cache.get("a@example.com"))[1] == {"status": "ACTIVE"}
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (9, 1, 0.9)
+
+
+def test_suspended_user_is_refused_on_the_next_request(session_factory, add_user):
+    buyer = asyncio.run(add_user("buyer", status=UserStatus.ACTIVE))
+
+    async def suspend():
+        async with session_factory() as db:
+            await users.update_status(db, buyer.id, UserStatus.SUSPENDED)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'buyer@example.com'})}"}
+        for _ in range(2):  # The second one is served from the cache
+            response = client.get("/api/v1/users/me/", headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.json()["status"] == "ACTIVE"
+
+        asyncio.run(suspend())
+        assert client.get("/api/v1/users/me/", headers=headers).status_code == 403
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,85 @@
+# test_compression.py
+import asyncio
+import zlib
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import compression
+from app.core.compression import CompressionMiddleware, accepted_encoding
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return [{"id": i, "name": f"product {i}"} for i in range(200)]
+
+    @app.get("/small")
+    async def small():
+        return {"id": 1}
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter(["data: x\n\n"] * 200), media_type="text/event-stream")
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse("x" * 5000, headers={"content-encoding": "identity"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+def test_accepted_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert accepted_encoding("gzip, deflate") == "gzip"
+    assert accepted_encoding("gzip;q=0, deflate") is None
+    assert accepted_encoding("*") == "gzip"
+    assert accepted_encoding("") is None
+
+
+def test_whole_bodies():
+    client = TestClient(make_app())
+    response = client.get("/big", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)  # httpx decodes
+    assert response.json()[199]["id"] == 199
+
+    response = client.get("/small", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/big", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in response.headers and response.headers["vary"] == "Accept-Encoding"
+    response = client.get("/events", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/text", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "identity"
+
+
+def test_stream_chunks_decode_as_they_arrive(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": b'{"row": %d}\n' % i, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=500)(scope, receive, send))
+    start, *bodies = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each chunk is readable on its own arrival, nothing waits for the end of the stream
+    assert [decoder.decompress(body["body"]) for body in bodies[:3]] == [b'{"row": %d}\n' % i for i in range(3)]
+    decoder.decompress(bodies[3]["body"])
+    assert decoder.eof
@@ -0,0 +1,32 @@
+# test_conditional.py
+from datetime import datetime
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from app.core.conditional import conditional_response, make_validators
+
+app = FastAPI()
+etag, last_modified = make_validators(("item", 1, datetime(2024, 1, 1, 12)), [datetime(2024, 1, 1, 12)])
+
+
+@app.get("/item")
+async def read_item(request: Request, response: Response):
+    return conditional_response(request, response, etag, last_modified) or {"id": 1}
+
+
+def test_conditional_get():
+    client = TestClient(app)
+    response = client.get("/item")
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+    assert response.headers["last-modified"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+
+    assert client.get("/item", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/item", headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+    assert client.get("/item", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+    # If-None-Match takes precedence over If-Modified-Since
+    assert client.get(
+        "/item",
+        headers={"If-None-Match": 'W/"other"', "If-Modified-Since": response.headers["last-modified"]},
+    ).status_code == 200
+    assert client.get("/item", headers={"If-Modified-Since": response.headers["last-modified"]}).status_code == 304
+    assert client.get("/item", headers={"If-Modified-Since": "Mon, 01 Jan 2024 11:59:59 GMT"}).status_code == 200
@@ -0,0 +1,76 @@
+# test_crud_writes.py
+# Writes are one INSERT/UPDATE/DELETE ... RETURNING each: no SELECT before the write,
+# no refresh after the commit, and the cache hooks still run.
+import asyncio
+from decimal import Decimal
+import pytest
+from fastapi import HTTPException
+from app import crud
+from app.core.cache import catalog_cache
+from app.db.query_stats import instrument_engine, track_queries
+from app.models.schemas.category import CategoryCreate, CategoryUpdate
+from app.models.schemas.product import ProductCreate, ProductUpdate
+
+
+def test_writes_are_single_statements(engine, session_factory):
+    instrument_engine(engine)
+
+    async def run():
+        async with session_factory() as db:
+            with track_queries() as stats:
+                category = await crud.categories.create(db, CategoryCreate(name="tools"))
+            assert stats.count == 1
+            assert category.id and category.created_at  # Server defaults came back with the row
+
+            await catalog_cache.set(f"category:{category.id}", 0, {"stale": True})
+            with track_queries() as stats:
+                updated = await crud.categories.update(db, category.id, CategoryUpdate(description="hand tools"))
+            # UPDATE ... RETURNING, plus the ids of the cached products embedding the category
+            assert stats.count == 2
+            assert (updated.name, updated.description) == ("tools", "hand tools")
+            assert (await catalog_cache.get(f"category:{category.id}"))[1] is None
+
+            with track_queries() as stats:
+                product = await crud.products.create(
+                    db, ProductCreate(name="hammer", price=Decimal("9.99"), category_id=category.id)
+                )
+            # The category is already in the session, the images collection costs one SELECT
+            assert stats.count == 2
+            assert product.category is category and product.images == []
+
+            with track_queries() as stats:
+                product = await crud.products.update(db, product.id, ProductUpdate(price=12.5))
+            assert stats.count == 2
+            assert product.price == Decimal("12.50") and product.name == "hammer"
+            product_id = product.id
+
+            # Rolled back, which expires everything loaded in the session
+            with pytest.raises(HTTPException) as exc:
+                await crud.categories.create(db, CategoryCreate(name="tools"))
+            assert exc.value.status_code == 400
+
+            with track_queries() as stats:
+                assert await crud.products.delete(db, product_id)
+            assert stats.count == 1
+            assert not await crud.products.delete(db, product_id)
+            assert await crud.products.update(db, product_id, ProductUpdate(price=1)) is None
+
+    asyncio.run(run())
+
+
+def test_deleting_a_user_clears_their_audit_references(session_factory, add_user):
+    async def run():
+        admin = await add_user("admin")
+        async with session_factory() as db:
+            category = await crud.categories.create(db, CategoryCreate(name="tools"), created_by=admin.id)
+            product = await crud.products.create(
+                db, ProductCreate(name="hammer", price=Decimal("9.99"), category_id=category.id), created_by=admin.id
+            )
+            assert product.created_by == admin.id
+
+            assert await crud.user.delete(db, admin.id)
+            product = await crud.products.get(db, product.id)
+            assert (product.created_by, product.updated_by) == (None, None)
+            assert not await crud.user.delete(db, admin.id)
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+# test_import_time.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[2]
+# Generous default for shared CI machines, tighten with IMPORT_TIME_BUDGET (seconds)
+BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "5.0"))
+
+PROBE = r"""
+import sys, time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+from app.db.session import Base
+print(Base.registry._new_mappers)
+print(",".join(sorted(name for name in ("jose", "passlib", "cryptography", "bcrypt") if name in sys.modules)))
+"""
+
+
+def test_import_app_is_cheap():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    elapsed, unconfigured, loaded = out[-3:]
+    # JWT and bcrypt backends load on first use (or in the lifespan warm-up), not on import
+    assert loaded == ""
+    # Mappers are configured at startup, not by whatever CRUD module is imported first
+    assert unconfigured == "True"
+    assert float(elapsed) < BUDGET, f"import app.main took {float(elapsed):.2f}s, budget {BUDGET}s"
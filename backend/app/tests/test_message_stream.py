@@ -0,0 +1,149 @@
+# test_message_stream.py
+import asyncio
+from contextlib import AsyncExitStack
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from app.api.deps import STREAM_TOKEN_SCOPE, get_current_user, get_stream_user
+from app.api.v1.endpoints.message import stream_messages
+from app.core.cache import principal_cache
+from app.core.pubsub import RedisBroker, message_broker
+from app.core.security import create_access_token
+from app.crud import messages
+from app.models.schemas.message import MessageCreate
+
+
+def test_stream_replays_after_last_id_then_pushes(session_factory, add_user):
+    async def run():
+        sender, receiver = await add_user("s"), await add_user("r")
+        async with session_factory() as db:
+            seen = await messages.create(db, MessageCreate(message="seen", receiver_id=receiver.id), sender.id)
+            missed = await messages.create(db, MessageCreate(message="missed", receiver_id=receiver.id), sender.id)
+
+        response = await stream_messages(
+            last_id=None, last_event_id=seen.id, session_factory=session_factory, current_user=receiver
+        )
+        events = response.body_iterator
+        try:
+            assert await anext(events) == ": connected\n\n"
+            assert (await anext(events)).startswith(f"id: {missed.id}\n")
+            async with session_factory() as db:
+                live = await messages.create(db, MessageCreate(message="live", receiver_id=receiver.id), sender.id)
+            event = await asyncio.wait_for(anext(events), 1)
+            assert event.startswith(f"id: {live.id}\nevent: message\n")
+            assert '"message": "live"' in event
+        finally:
+            await events.aclose()
+
+    asyncio.run(run())
+
+
+def test_stream_authenticates_without_an_authorization_header(session_factory, add_user):
+    async def run():
+        await principal_cache.clear()
+        await add_user("r")
+        async with session_factory() as db:
+            access = create_access_token({"sub": "r@example.com"})
+            scoped = create_access_token({"sub": "r@example.com", "scope": STREAM_TOKEN_SCOPE})
+            expired = create_access_token({"sub": "r@example.com", "scope": STREAM_TOKEN_SCOPE}, timedelta(seconds=-1))
+
+            async def stream_user(token=None, cookie_token=None, stream_token=None):
+                user = await get_stream_user(db, token=token, cookie_token=cookie_token, stream_token=stream_token)
+                return user.email
+
+            assert await stream_user(token=access) == "r@example.com"
+            assert await stream_user(cookie_token=access) == "r@example.com"
+            assert await stream_user(stream_token=scoped) == "r@example.com"
+            # A full access token is not taken from the query string, where it would be logged
+            for kwargs in ({}, {"stream_token": access}, {"stream_token": expired}, {"cookie_token": scoped}):
+                with pytest.raises(HTTPException) as refused:
+                    await stream_user(**kwargs)
+                assert refused.value.status_code == 401
+            # and a stream token is no good anywhere else
+            with pytest.raises(HTTPException):
+                await get_current_user(db, scoped)
+        await principal_cache.clear()
+
+    asyncio.run(run())
+
+
+def test_message_is_saved_when_publishing_fails(session_factory, add_user, monkeypatch):
+    async def broken_publish(channel, message):
+        raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(message_broker, "publish", broken_publish)
+
+    async def run():
+        sender, receiver = await add_user("s"), await add_user("r")
+        async with session_factory() as db:
+            message = await messages.create(db, MessageCreate(message="hi", receiver_id=receiver.id), sender.id)
+            assert [m.id for m in await messages.get_received_after(db, receiver.id, 0, 10)] == [message.id]
+
+    asyncio.run(run())
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for RedisBroker: psubscribe, listen, publish"""
+
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, data):
+        for pubsub in self.pubsubs:
+            pubsub.queue.put_nowait({"type": "pmessage", "channel": channel.encode(), "data": data})
+
+    async def aclose(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def psubscribe(self, pattern):
+        await asyncio.sleep(0)  # A round trip, other subscribers run meanwhile
+
+    async def listen(self):
+        while True:
+            message = await self.queue.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def aclose(self):
+        pass
+
+
+def test_redis_broker_runs_one_listener_and_cuts_off_on_failure():
+    async def run():
+        client = FakeRedis()
+        broker = RedisBroker("redis://fake", queue_size=10, client=client)
+        async with AsyncExitStack() as stack:
+            first, second = await asyncio.gather(
+                *(stack.enter_async_context(broker.subscribe("user:1")) for _ in range(2))
+            )
+            assert len(client.pubsubs) == 1
+            await broker.publish("user:1", {"id": 1})
+            assert await asyncio.wait_for(first.queue.get(), 1) == {"id": 1}
+            assert await asyncio.wait_for(second.queue.get(), 1) == {"id": 1}
+            assert first.queue.empty() and second.queue.empty()  # Delivered once each
+
+            # The listener dies: subscribers are told instead of waiting forever
+            client.pubsubs[0].queue.put_nowait(ConnectionError("connection lost"))
+            assert await asyncio.wait_for(first.queue.get(), 1) is None
+            assert first.overflowed and second.overflowed
+            assert broker.stats()["listener_failures"] == 1
+
+            # The next subscriber (a reconnect) starts a new listener
+            third = await stack.enter_async_context(broker.subscribe("user:1"))
+            assert len(client.pubsubs) == 2
+            await broker.publish("user:1", {"id": 2})
+            assert await asyncio.wait_for(third.queue.get(), 1) == {"id": 2}
+        await broker.close()
+
+    asyncio.run(run())
@@ -0,0 +1,90 @@
+# test_message_threads.py
+import asyncio
+from datetime import datetime
+from sqlalchemy import select
+from app.crud import messages
+from app.crud.message_threads import message_threads
+from app.db.query_stats import instrument_engine, track_queries
+from app.models import Messages, MessageThreads
+from app.models.schemas.message import MessageCreate, MessageUpdate
+
+
+async def thread_rows(db):
+    # Timestamps left out: SQLite stores CURRENT_TIMESTAMP and bound datetimes differently
+    return (
+        await db.execute(
+            select(
+                MessageThreads.user_id, MessageThreads.counterpart_id, MessageThreads.last_message_id, MessageThreads.unread
+            ).order_by(MessageThreads.user_id, MessageThreads.counterpart_id)
+        )
+    ).all()
+
+
+def test_threads_latest_message_and_unread(engine, session_factory, add_user):
+    instrument_engine(engine)
+
+    async def run():
+        me, bob, carol = [await add_user(name) for name in ("me", "bob", "carol")]
+        async with session_factory() as db:
+            # One timestamp for all, stored the way cursors compare it (not CURRENT_TIMESTAMP's format)
+            sent = datetime(2025, 1, 2, 3, 4, 5)
+            for sender, receiver, text in [
+                (bob, me, "hi"),
+                (bob, me, "are you there"),
+                (carol, me, "hello"),
+                (me, carol, "hey carol"),
+                (carol, bob, "not for me"),
+            ]:
+                db.add(Messages(sender_id=sender.id, receiver_id=receiver.id, message=text, date_time_sent=sent))
+                await db.flush()
+            await db.commit()
+            # Written around CRUDMessages, as messages were before the threads table
+            assert await message_threads.rebuild(db) == 6
+
+            with track_queries() as stats:
+                page = await messages.get_threads(db, me.id)
+            assert stats.count == 1
+            # Same timestamps, the counterpart id breaks the tie
+            assert [(t.counterpart.id, t.last_message.message, t.unread) for t in page.items] == [
+                (carol.id, "hey carol", 1),
+                (bob.id, "are you there", 2),
+            ]
+            assert page.next_cursor is None
+
+            # One conversation per page
+            first = await messages.get_threads(db, me.id, limit=1)
+            second = await messages.get_threads(db, me.id, limit=1, cursor=first.next_cursor)
+            assert [t.counterpart.id for t in first.items + second.items] == [carol.id, bob.id]
+            assert second.next_cursor is None
+
+            page = await messages.get_thread(db, me.id, carol.id)
+            assert [m.message for m in page.items] == ["hey carol", "hello"]
+
+            assert await messages.mark_read(db, me.id, bob.id) == 2
+            threads = (await messages.get_threads(db, me.id)).items
+            assert [t.unread for t in threads] == [1, 0]
+
+            # Kept in step by the writes: a new message moves its thread to the top
+            # (sent within the same second, bob's id still puts "again" first)
+            await messages.create(db, MessageCreate(message="note", receiver_id=me.id), me.id)
+            again = await messages.create(db, MessageCreate(message="again", receiver_id=me.id), bob.id)
+            threads = (await messages.get_threads(db, me.id)).items
+            assert [(t.counterpart.id, t.last_message.message, t.unread) for t in threads] == [
+                (bob.id, "again", 1),
+                (me.id, "note", 1),
+                (carol.id, "hey carol", 1),
+            ]
+            assert await messages.delete(db, threads[2].last_message.id)
+            await messages.update(db, again.id, MessageUpdate(receiver_id=carol.id))
+            threads = (await messages.get_threads(db, me.id)).items
+            assert [(t.counterpart.id, t.last_message.message, t.unread) for t in threads] == [
+                (me.id, "note", 1),
+                (carol.id, "hello", 1),
+                (bob.id, "are you there", 0),
+            ]
+
+            maintained = await thread_rows(db)
+            await message_threads.rebuild(db)
+            assert await thread_rows(db) == maintained
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+# test_migrations.py
+import warnings
+from pathlib import Path
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.db.session import Base
+import app.models  # noqa: F401
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+
+def alembic_config(url):
+    config = Config(str(BACKEND / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def test_migrations_match_models(tmp_path):
+    path = tmp_path / "migrations.sqlite"
+    config = alembic_config(f"sqlite+aiosqlite:///{path}")
+    command.upgrade(config, "head")
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn, warnings.catch_warnings():
+        # SQLite cannot reflect expression indexes (ix_messages_conversation)
+        warnings.simplefilter("ignore")
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        indexes = set(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'")))
+    assert diff == []
+    assert "ix_messages_conversation" in indexes
+
+    command.downgrade(config, "base")
+    with engine.connect() as conn:
+        assert inspect(conn).get_table_names() == ["alembic_version"]
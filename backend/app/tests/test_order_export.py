@@ -0,0 +1,77 @@
+# test_order_export.py
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints.order import export_orders, get_current_admin_user
+from app.core.config import settings
+from app.crud import orders
+from app.db.replicas import get_read_session_factory
+from app.main import app
+from app.models import Category, Orders, Product
+from app.models.schemas.order import OrderStatus
+
+
+def test_export_streams_in_partitions(session_factory, user, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_YIELD_PER", 2)
+    statuses = [OrderStatus.REQUEST, OrderStatus.APPROVED, OrderStatus.REQUEST, OrderStatus.CANCELLED, OrderStatus.REQUEST]
+
+    async def seed():
+        async with session_factory() as db:
+            hammer = Product(name="hammer", price=Decimal("1"), category=Category(name="tools"))
+            db.add(hammer)
+            await db.flush()
+            db.add_all(
+                Orders(
+                    order_number=100 + day,
+                    status=status,
+                    product_id=hammer.id,
+                    customer_id=user.id,
+                    requested_by=user.id,
+                    date_requested=datetime(2025, 1, day),
+                )
+                for day, status in enumerate(statuses, start=1)
+            )
+            await db.commit()
+
+    async def export(**filters):
+        async with session_factory() as db:
+            return [[row.order_number for row in rows] async for rows in orders.stream_export(db, **filters)]
+
+    asyncio.run(seed())
+    # EXPORT_YIELD_PER rows per partition, in id order
+    assert asyncio.run(export()) == [[101, 102], [103, 104], [105]]
+    assert asyncio.run(export(status=OrderStatus.REQUEST)) == [[101, 103], [105]]
+    assert asyncio.run(export(date_from=datetime(2025, 1, 2), date_to=datetime(2025, 1, 4))) == [[102, 103]]
+
+    async def body_chunks():
+        response = await export_orders(
+            format="csv", status_filter=None, date_from=None, date_to=None,
+            session_factory=session_factory, current_user=user,
+        )
+        return [chunk async for chunk in response.body_iterator]
+
+    # Streamed as the partitions come: the header, then one chunk each
+    chunks = asyncio.run(body_chunks())
+    assert len(chunks) == 4
+    lines = "".join(chunks).splitlines()
+    assert lines[0] == ",".join(column.key for column in orders.export_columns)
+    assert [line.split(",")[1] for line in lines[1:]] == ["101", "102", "103", "104", "105"]
+
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+    app.dependency_overrides[get_current_admin_user] = lambda: user
+    try:
+        client = TestClient(app)
+        response = client.get("/api/v1/orders/orders/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text == "".join(chunks)
+
+        response = client.get("/api/v1/orders/orders/export", params={"format": "ndjson", "status": "APPROVED"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [(r["order_number"], r["status"], r["date_requested"]) for r in records] == [
+            (102, "APPROVED", "2025-01-02T00:00:00")
+        ]
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,85 @@
+# test_order_stats.py
+import asyncio
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints.order import get_current_admin_user
+from app.crud import orders
+from app.crud.order_stats import order_stats
+from app.db.session import get_db
+from app.main import app
+from app.models import Category, Product
+from app.models.schemas.order import OrderCreate, OrderUpdate, OrderStatus
+
+
+def test_order_writes_keep_stats_in_step(session_factory, user):
+    async def run():
+        async with session_factory() as db:
+            category = Category(name="tools")
+            hammer = Product(name="hammer", price=Decimal("1"), category=category)
+            saw = Product(name="saw", price=Decimal("1"), category=category)
+            db.add_all([category, hammer, saw])
+            await db.commit()
+
+            created = [
+                await orders.create(db, OrderCreate(product_id=hammer.id, customer_id=user.id), user.id)
+                for _ in range(3)
+            ]
+            await orders.approve_order(db, created[0].id, user.id)
+            await orders.update(db, created[1].id, OrderUpdate(product_id=saw.id), user.id)
+            await orders.delete(db, created[2].id)
+            summary = await order_stats.get_summary(db)
+        return summary, hammer.id, saw.id
+
+    summary, hammer_id, saw_id = asyncio.run(run())
+    assert summary.total == 2
+    assert summary.by_status == {OrderStatus.APPROVED: 1, OrderStatus.REQUEST: 1}
+    assert [(p.product_id, p.by_status) for p in summary.by_product] == [
+        (hammer_id, {OrderStatus.APPROVED: 1}),
+        (saw_id, {OrderStatus.REQUEST: 1}),
+    ]
+    assert len(summary.by_day) == 1 and summary.by_day[0].total == 2
+
+
+def test_bulk_transitions_only_move_requested_orders(session_factory, user):
+    async def seed():
+        async with session_factory() as db:
+            hammer = Product(name="hammer", price=Decimal("1"), category=Category(name="tools"))
+            db.add(hammer)
+            await db.commit()
+            created = [
+                await orders.create(db, OrderCreate(product_id=hammer.id, customer_id=user.id), user.id)
+                for _ in range(4)
+            ]
+            await orders.approve_order(db, created[0].id, user.id)
+            return [order.id for order in created]
+
+    async def summary():
+        async with session_factory() as db:
+            return await order_stats.get_summary(db)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    ids = asyncio.run(seed())
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin_user] = lambda: user
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/orders/orders/approve", json={"order_ids": [ids[2], ids[0], ids[1], 999, ids[1]]})
+        assert response.status_code == 200, response.text
+        assert response.json() == {"applied": [ids[1], ids[2]], "skipped": [ids[0]], "missing": [999]}
+
+        response = client.post("/api/v1/orders/orders/cancel", json={"order_ids": [ids[1], ids[3]]})
+        assert response.json() == {"applied": [ids[3]], "skipped": [ids[1]], "missing": []}
+
+        stats = asyncio.run(summary())
+        assert stats.total == 4
+        assert stats.by_status == {OrderStatus.APPROVED: 3, OrderStatus.CANCELLED: 1}
+        assert [p.by_status for p in stats.by_product] == [{OrderStatus.APPROVED: 3, OrderStatus.CANCELLED: 1}]
+
+        for order_ids in ([], list(range(1, 1002))):
+            response = client.post("/api/v1/orders/orders/approve", json={"order_ids": order_ids})
+            assert response.status_code == 422
+    finally:
+        app.dependency_overrides.clear()
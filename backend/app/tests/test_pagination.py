@@ -0,0 +1,81 @@
+# test_pagination.py
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.crud.pagination import encode_cursor, decode_cursor
+from app.db.replicas import get_read_db
+from app.main import app
+from app.models import Category, Product, User
+
+
+def test_cursor_round_trip():
+    values = [Decimal("19.99"), datetime(2025, 1, 2, 3, 4, 5), "name", 42]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    keys = [Product.price, Product.created_at, Product.name, Product.id]
+    assert decode_cursor(cursor, keys) == values
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", [User.id])
+    assert exc.value.status_code == 400
+
+    bad = [
+        encode_cursor([1, 2]),  # Too many values
+        encode_cursor(["1"]),  # A string for an integer key
+        encode_cursor([True]),
+        encode_cursor([{"dt": 5}]),  # TypeError in fromisoformat
+        encode_cursor([{"dec": "abc"}]),
+        encode_cursor([{"other": 1}]),
+    ]
+    for cursor in bad:
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(cursor, [User.id])
+        assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor([9.99, 1]), [Product.price, Product.id])  # Prices are Decimals
+
+
+def test_cursor_pages_through_ties_without_duplicates_or_gaps(session_factory):
+    # Three prices over eleven products, so most pages cut through a run of ties
+    prices = [Decimal(("5.00", "7.50", "9.99")[i % 3]) for i in range(11)]
+
+    async def seed():
+        async with session_factory() as db:
+            category = Category(name="tools")
+            db.add_all([Product(name=f"p{i:02d}", price=price, category=category) for i, price in enumerate(prices)])
+            await db.commit()
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    asyncio.run(seed())
+    app.dependency_overrides[get_read_db] = override_get_db
+    try:
+        client = TestClient(app)
+        for order in ("asc", "desc"):
+            seen, cursor = [], None
+            while True:
+                params = {"sort": "price", "order": order, "limit": 3, **({"cursor": cursor} if cursor else {})}
+                response = client.get("/api/v1/products/products/", params=params)
+                assert response.status_code == 200, response.text
+                seen += [(Decimal(str(item["price"])), item["name"]) for item in response.json()]
+                cursor = response.headers.get("x-next-cursor")
+                if cursor is None:
+                    break
+            # Every product exactly once, ties broken by id
+            expected = sorted(
+                ((price, f"p{i:02d}") for i, price in enumerate(prices)), reverse=order == "desc"
+            )
+            assert seen == expected
+            assert len(response.json()) == 2  # The last page is the partial one, without a cursor
+
+        response = client.get("/api/v1/products/products/", params={"sort": "price", "cursor": encode_cursor(["x", 1])})
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
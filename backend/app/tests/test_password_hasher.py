@@ -0,0 +1,55 @@
+# test_password_hasher.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+from app.core.security import PasswordHasher
+
+
+def test_hasher_sheds_beyond_workers_and_queue():
+    hasher = PasswordHasher(workers=1, queue_size=1, rounds=4, retry_after=2)
+    # Threads stand in for the worker processes, so the test controls when work ends
+    hasher._executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+
+    def blocked():
+        release.wait()
+        return "hash"
+
+    def broken():
+        raise ValueError("invalid salt")
+
+    async def run():
+        running = [asyncio.create_task(hasher._run(blocked)) for _ in range(2)]
+        while hasher.in_flight < 2:
+            await asyncio.sleep(0)
+        # One hashing, one queued: the third is refused at once
+        with pytest.raises(HTTPException) as exc:
+            await hasher._run(blocked)
+        assert exc.value.status_code == 503
+        assert exc.value.headers == {"Retry-After": "2"}
+
+        release.set()
+        assert await asyncio.gather(*running) == ["hash", "hash"]
+        with pytest.raises(ValueError):
+            await hasher._run(broken)
+
+    asyncio.run(run())
+    stats = hasher.stats()
+    assert (stats["in_flight"], stats["completed"], stats["failed"], stats["rejected"]) == (0, 2, 1, 1)
+    hasher.shutdown()
+
+
+def test_hasher_round_trip():
+    hasher = PasswordHasher(workers=1, queue_size=0, rounds=4, retry_after=1)
+
+    async def run():
+        hashed = await hasher.hash("secret")
+        return await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+    try:
+        assert asyncio.run(run()) == (True, False)
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["completed"] == 3
@@ -0,0 +1,92 @@
+# test_product_import.py
+import asyncio
+from decimal import Decimal
+from sqlalchemy import select, text
+from app import crud
+from app.crud.product_import import import_products, iter_csv_records, iter_lines, iter_ndjson_records
+from app.models.products import Product
+from app.models.schemas.category import CategoryCreate
+import pytest
+from pydantic import ValidationError
+from app.models.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate
+
+
+async def chunked(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def collect(records, data: bytes) -> list:
+    async def run():
+        return [record async for record in records(iter_lines(chunked(data)))]
+
+    return asyncio.run(run())
+
+
+def test_csv_records_span_chunks_and_quoted_newlines():
+    data = (
+        "﻿name,description,price,category_id\r\n"
+        'Hammer,"Claw hammer, 16oz",9.99,1\r\n'
+        '"Drill ""Pro""","Line one\nline two",,2\n'
+        "\n"
+        "Saw,too,many,fields,1\n"
+    ).encode()
+    assert collect(iter_csv_records, data) == [
+        (1, {"name": "Hammer", "description": "Claw hammer, 16oz", "price": "9.99", "category_id": "1"}),
+        (2, {"name": 'Drill "Pro"', "description": "Line one\nline two", "category_id": "2"}),
+        (3, "Expected 4 fields, got 5"),
+    ]
+
+
+def test_price_bounds_apply_to_writes_only():
+    for bad in (-1, float("nan"), 100_000_000):
+        with pytest.raises(ValidationError):
+            ProductCreate(name="x", price=bad, category_id=1)
+        with pytest.raises(ValidationError):
+            ProductUpdate(price=bad)
+    # A row written before the bounds still serializes
+    category = {"id": 1, "name": "tools", "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"}
+    assert ProductSchema(id=1, name="x", price=-1, category_id=1, category=category).price == -1
+
+
+def test_ndjson_records_report_bad_lines():
+    data = b'{"name": "Hammer", "price": 9.99, "category_id": 1}\n\n{"name": \n[1, 2]'
+    records = collect(iter_ndjson_records, data)
+    assert records[0] == (1, {"name": "Hammer", "price": 9.99, "category_id": 1})
+    assert records[1][0] == 2 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (3, "Expected a JSON object")
+
+
+def test_import_inserts_updates_and_rejects_rows(engine, session_factory):
+    async def run():
+        async with engine.begin() as conn:
+            # Stands in for a row the database refuses after it passed validation
+            await conn.execute(text(
+                "CREATE TRIGGER refuse_anvil BEFORE INSERT ON products WHEN NEW.name = 'Anvil' "
+                "BEGIN SELECT RAISE(ABORT, 'no anvils'); END"
+            ))
+        async with session_factory() as db:
+            category = await crud.categories.create(db, CategoryCreate(name="tools"))
+            await crud.products.create(db, ProductCreate(name="Saw", price=5, category_id=category.id))
+            data = (
+                "name,price,category_id\n"
+                f"Hammer,9.99,{category.id}\n"
+                f"Saw,7.5,{category.id}\n"
+                f"Anvil,120,{category.id}\n"
+                f"Hammer,8,{category.id}\n"
+                f"Drill,nan,{category.id}\n"
+                f"Press,100000000,{category.id}\n"
+                "Lathe,10,999\n"
+            ).encode()
+            report = await import_products(db, chunked(data), "csv")
+            assert (report.rows, report.created, report.updated, report.failed) == (7, 1, 1, 5)
+            errors = {error["row"]: error["error"] for error in report.errors}
+            assert errors[3].startswith("Rejected by the database") and "no anvils" in errors[3]
+            assert errors[4] == "name: 'Hammer' already in row 1"
+            assert errors[5].startswith("price:") and errors[6].startswith("price:")
+            assert errors[7] == "category_id: 999 does not exist"
+
+            rows = (await db.execute(select(Product.name, Product.price).order_by(Product.name))).all()
+            assert rows == [("Hammer", Decimal("9.99")), ("Saw", Decimal("7.50"))]
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+# test_product_listing.py
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from app.crud import products
+from app.models import Category, Product
+
+
+def test_listing_filters_and_sorts(session_factory):
+    async def run():
+        async with session_factory() as db:
+            tools, garden = Category(name="tools"), Category(name="garden")
+            # (name, price, category, created day)
+            for name, price, category, day in [
+                ("hammer", "9.99", tools, 3),
+                ("hand saw", "12.00", tools, 1),
+                ("50% off drill", "45.00", tools, 2),
+                ("500 nails", "4.50", tools, 4),
+                ("hose", "12.00", garden, 5),
+            ]:
+                db.add(Product(name=name, price=Decimal(price), category=category, created_at=datetime(2025, 1, day)))
+            await db.commit()
+
+            async def names(**kwargs):
+                return [product.name for product in (await products.get_all_products(db, **kwargs)).items]
+
+            assert await names() == ["50% off drill", "500 nails", "hammer", "hand saw", "hose"]
+            assert await names(category_id=garden.id) == ["hose"]
+            assert await names(min_price=Decimal("9.99"), max_price=Decimal("12")) == ["hammer", "hand saw", "hose"]
+            assert await names(name_prefix="ha") == ["hammer", "hand saw"]
+            # The prefix is matched literally, % is not a wildcard
+            assert await names(name_prefix="50%") == ["50% off drill"]
+            # Equal prices are ordered by id
+            assert await names(sort="price") == ["500 nails", "hammer", "hand saw", "hose", "50% off drill"]
+            assert await names(sort="price", descending=True) == [
+                "50% off drill", "hose", "hand saw", "hammer", "500 nails"
+            ]
+            assert await names(sort="created_at", category_id=tools.id, descending=True) == [
+                "500 nails", "hammer", "50% off drill", "hand saw"
+            ]
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+# test_product_search.py
+# Full-text and trigram search are Postgres only: set TEST_DATABASE_URL to an empty
+# postgresql+asyncpg database to run this, see the pg_engine fixture.
+import asyncio
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.crud import products
+from app.models import Category, Product
+
+
+def test_search_ranks_name_matches_and_tolerates_typos(pg_engine):
+    async def run():
+        async with async_sessionmaker(pg_engine, expire_on_commit=False)() as db:
+            category = Category(name="tools")
+            db.add_all(
+                [
+                    Product(name="Claw hammer", description="Steel, 16oz", price=Decimal("9.99"), category=category),
+                    Product(name="Nail set", description="For use with any hammer", price=Decimal("4.50"), category=category),
+                    Product(name="Hand saw", description="Cross cut", price=Decimal("12"), category=category),
+                ]
+            )
+            await db.commit()
+
+            # Stemmed: "hammers" matches both, the name (weight A) before the description (B)
+            assert [p.name for p in await products.search(db, "hammers")] == ["Claw hammer", "Nail set"]
+            # websearch syntax
+            assert [p.name for p in await products.search(db, "hammer -nail")] == ["Claw hammer"]
+            # No lexeme matches the typo, the trigram index on name does
+            assert [p.name for p in await products.search(db, "hamer")] == ["Claw hammer"]
+            assert await products.search(db, "drill") == []
+            assert [p.name for p in await products.search(db, "hammer", skip=1)] == ["Nail set"]
+
+    asyncio.run(run())
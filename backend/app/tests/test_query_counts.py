@@ -0,0 +1,117 @@
+# test_query_counts.py
+# A page of N items must cost the same number of SQL statements as a small page,
+# i.e. every relationship embedded in a response model is eagerly loaded.
+import asyncio
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.main import app
+from app.db.session import get_db
+from app.db.replicas import get_read_db
+from app.db.query_stats import instrument_engine, statement_shape, track_queries
+from app.api.deps import get_current_active_user
+from app.models import User, Category, Product, ProductImages, Orders, Messages
+
+LIST_ENDPOINTS = [
+    "/api/v1/users/",
+    "/api/v1/categories/categories/",
+    "/api/v1/products/products/",
+    "/api/v1/orders/orders/",
+    "/api/v1/messages/messages/sent/",
+    "/api/v1/messages/messages/received/",
+]
+
+
+async def seed(session_factory, n: int):
+    async with session_factory() as db:
+        users = [
+            User(
+                email=f"user{i}@example.com",
+                first_name="Test",
+                last_name=f"User{i}",
+                phone_number=f"09{i:08d}",
+                hashed_password="x",
+            )
+            for i in range(n + 1)
+        ]
+        db.add_all(users)
+        await db.flush()
+        for i in range(n):
+            category = Category(name=f"category{i}")
+            product = Product(name=f"product{i}", price=Decimal("9.99"), category=category)
+            db.add_all([category, product])
+            await db.flush()
+            db.add_all(
+                [
+                    ProductImages(image_url=f"/img/{i}/a.png", product_id=product.id),
+                    ProductImages(image_url=f"/img/{i}/b.png", product_id=product.id),
+                    Orders(
+                        order_number=i,
+                        product_id=product.id,
+                        customer_id=users[i + 1].id,
+                        requested_by=users[0].id,
+                    ),
+                    # Alternate so the current user is both sender and receiver
+                    Messages(
+                        message=f"message{i}",
+                        sender_id=users[0].id if i % 2 else users[i + 1].id,
+                        receiver_id=users[i + 1].id if i % 2 else users[0].id,
+                    ),
+                ]
+            )
+        await db.commit()
+        return users[0].id
+
+
+def count_queries(make_engine, n: int) -> dict:
+    engine = make_engine(f"db_{n}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    current_user = User(id=asyncio.run(seed(session_factory, n)))
+    instrument_engine(engine)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_current_active_user] = lambda: current_user
+    try:
+        client = TestClient(app)
+        counts = {}
+        for url in LIST_ENDPOINTS:
+            response = client.get(url)
+            assert response.status_code == 200, response.text
+            assert response.json()
+            assert response.headers["server-timing"].startswith("db;dur=")
+            counts[url] = int(response.headers["x-db-query-count"])
+        return counts
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_list_endpoints_use_constant_queries(make_engine):
+    small = count_queries(make_engine, 2)
+    page = count_queries(make_engine, 25)
+    assert page == small
+
+    # products: main SELECT (category joined) + one SELECT for images
+    assert page["/api/v1/products/products/"] == 2
+    for url in LIST_ENDPOINTS:
+        if url != "/api/v1/products/products/":
+            assert page[url] == 1, url
+
+
+def test_track_queries_groups_statement_shapes(engine):
+    instrument_engine(engine)
+
+    async def run():
+        async with engine.connect() as conn:
+            for i in range(3):
+                await conn.exec_driver_sql("SELECT ?", (i,))
+
+    with track_queries() as stats:
+        asyncio.run(run())
+    assert stats.count == 3
+    assert stats.repeated(2) == [("SELECT ?", 3)]
+    assert statement_shape("SELECT * FROM t WHERE id IN ($1, $2, $3)") == "SELECT * FROM t WHERE id IN (?)"
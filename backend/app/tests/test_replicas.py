@@ -0,0 +1,72 @@
+# test_replicas.py
+# A primary and two stand-in replicas as separate SQLite files, each holding a
+# different category name so the response tells which database served the read.
+import asyncio
+import time
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.core.cache import MemoryCacheBackend
+from app.core.security import create_access_token
+from app.db import replicas
+from app.db.replicas import ReadYourWritesMiddleware, ReplicaRouter, get_read_db
+from app.db.session import make_sessionmaker
+from app.models import Category
+
+
+def test_reads_go_to_replicas_until_the_user_writes(make_engine, monkeypatch):
+    def make_database(name):
+        engine = make_engine(name, pooled=True)
+
+        async def seed():
+            async with make_sessionmaker(engine)() as db:
+                db.add(Category(name=name))
+                await db.commit()
+
+        asyncio.run(seed())
+        return engine
+
+    primary = make_database("primary")
+    router = ReplicaRouter(
+        make_sessionmaker(primary),
+        [make_database(f"replica{i}") for i in (1, 2)],
+        stick_seconds=30,
+        pins=MemoryCacheBackend(maxsize=100, ttl=30),
+    )
+    monkeypatch.setattr(replicas, "read_router", router)
+
+    app = FastAPI()
+
+    @app.get("/categories")
+    async def read(db=Depends(get_read_db)):
+        return await db.scalar(select(Category.name))
+
+    @app.post("/categories")
+    async def write():
+        return "ok"
+
+    app.add_middleware(ReadYourWritesMiddleware)
+    client = TestClient(app)
+    writer = {"Authorization": f"Bearer {create_access_token({'sub': 'writer@example.com'})}"}
+    other = {"Authorization": f"Bearer {create_access_token({'sub': 'other@example.com'})}"}
+
+    # Round-robin over the replicas
+    assert [client.get("/categories", headers=writer).json() for _ in range(3)] == [
+        "replica1", "replica2", "replica1"
+    ]
+
+    # A write pins this user's reads to the primary, whatever the client keeps
+    response = client.post("/categories", headers=writer)
+    assert "set-cookie" not in response.headers
+    assert client.get("/categories", headers=writer).json() == "primary"
+    assert client.get("/categories", headers=other).json() == "replica2"
+    assert client.get("/categories").json() == "replica1"
+
+    # Once the window has passed, reads go back to the replicas
+    now = time.time()
+    monkeypatch.setattr(replicas.time, "time", lambda: now + 31)
+    assert client.get("/categories", headers=writer).json() == "replica2"
+
+    stats = router.stats()
+    assert stats["reads"] == {"replica": 6, "primary": 1}
+    assert [replica["checkouts"] for replica in stats["replicas"]] == [5, 5]  # Two while seeding, three reads each
@@ -0,0 +1,40 @@
+# test_sequence.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import Column, Integer, Sequence
+from app.db.sequence import BlockSequence
+
+
+class FakeSession:
+    """A sequence with INCREMENT BY increment: pg_sequences and nextval()"""
+
+    def __init__(self, increment: int = 10):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(supports_sequences=True))
+        self.increment = increment
+        self.calls = 0
+
+    async def scalar(self, stmt, params=None):
+        if "pg_sequences" in str(stmt):
+            return self.increment
+        self.calls += 1
+        return 1 + (self.calls - 1) * self.increment
+
+
+def test_block_sequence_reserves_blocks():
+    numbers = BlockSequence(Sequence("test_seq", increment=10), Column("n", Integer))
+    db = FakeSession()
+
+    async def allocate(n):
+        return await asyncio.gather(*(numbers.next(db) for _ in range(n)))
+
+    values = asyncio.run(allocate(25))
+    assert sorted(values) == list(range(1, 26))
+    assert db.calls == 3
+
+
+def test_block_sequence_refuses_a_different_database_increment():
+    numbers = BlockSequence(Sequence("test_seq", increment=100), Column("n", Integer))
+    with pytest.raises(RuntimeError, match="increments by 10"):
+        asyncio.run(numbers.next(FakeSession(increment=10)))
+    assert numbers.block_size is None
@@ -0,0 +1,52 @@
+# test_serialization.py
+import json
+from datetime import datetime
+from typing import List
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from app.core.serialization import adapter, model_response, trusted_response
+from app.models import Messages, User
+from app.models.schemas.message import Message
+
+
+def make_messages():
+    sent = datetime(2024, 1, 1, 12, 0, 0)
+    users = [
+        User(id=i, email=f"user{i}@example.com", first_name="F", last_name="L", phone_number="0900000000",
+             status="ACTIVE", role="USER", created_at=sent, updated_at=sent)
+        for i in (1, 2)
+    ]
+    return [
+        Messages(id=i, message=f"m{i}", sender_id=1, sender=users[0], receiver_id=2, receiver=users[1], date_time_sent=sent)
+        for i in (1, 2)
+    ]
+
+
+def test_fast_path_matches_response_model():
+    app = FastAPI()
+    rows = make_messages()
+
+    @app.get("/default", response_model=List[Message])
+    async def default(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return rows
+
+    @app.get("/fast", response_model=List[Message])
+    async def fast(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return model_response(List[Message], rows, response)
+
+    @app.get("/trusted")
+    async def trusted(response: Response):
+        response.status_code = 201
+        return trusted_response({"id": 1}, response)
+
+    client = TestClient(app)
+    default_response, fast_response = client.get("/default"), client.get("/fast")
+    assert fast_response.json() == default_response.json()
+    assert fast_response.headers["x-next-cursor"] == "abc"
+    assert fast_response.headers["content-type"] == "application/json"
+    created = client.get("/trusted")
+    assert created.status_code == 201 and json.loads(created.content) == {"id": 1}
+    # Same adapter for the same response type
+    assert adapter(List[Message]) is adapter(List[Message])
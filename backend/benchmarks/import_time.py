@@ -0,0 +1,78 @@
+"""Cold import of app.main, what every worker and every test run pays before anything else.
+
+Imports the app in fresh interpreters, reports the median wall time and the
+modules with the highest self time (python -X importtime), and checks the
+modules that must stay out of the import (loaded lazily or at startup).
+
+    PYTHONPATH=. python benchmarks/import_time.py --runs 7 --top 15
+    PYTHONPATH=. python benchmarks/import_time.py --budget 1.5
+
+With --budget (seconds) the script exits non-zero when the median is over it,
+or when a lazily loaded module shows up in the import.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Loaded on first use or by the lifespan warm-up, never by `import app.main`
+LAZY_MODULES = ("jose", "passlib", "cryptography", "bcrypt")
+
+PROBE = r"""
+import sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+from app.db.session import Base
+print(elapsed)
+print(",".join(name for name in sys.argv[1:] if name in sys.modules))
+print(Base.registry._new_mappers)  # True while mappers are still unconfigured
+"""
+
+
+def probe():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, *LAZY_MODULES], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    elapsed, loaded, unconfigured = out[-3:]
+    return float(elapsed), [name for name in loaded.split(",") if name], unconfigured == "True"
+
+
+def self_times():
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, default=None, help="fail above this median, seconds")
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    median = statistics.median(elapsed for elapsed, _, _ in results)
+    loaded = sorted({name for _, names, _ in results for name in names})
+    unconfigured = all(flag for _, _, flag in results)
+
+    print(f"import app.main  median {median * 1000:.0f} ms over {args.runs} runs")
+    print(f"lazy modules loaded: {', '.join(loaded) or 'none'}")
+    print(f"mappers configured at import: {'no' if unconfigured else 'yes'}")
+    print(f"\n{'self ms':>8} {'cum ms':>8}  module")
+    for self_us, cumulative_us, name in self_times()[: args.top]:
+        print(f"{self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}")
+
+    if args.budget is not None and (median > args.budget or loaded):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Mixed login / catalog read load against a running API.
+
+Fires concurrent logins alongside concurrent product reads and reports p50/p99
+latency for each class, so the effect of bcrypt on unrelated traffic is visible.
+
+    uvicorn app.main:app --workers 1
+    python benchmarks/login_mixed_load.py --email admin@example.com \
+        --password adminpassword --product-id 1
+
+Requires httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def worker(client, deadline, request, latencies, statuses):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await request(client)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run(args):
+    login_latencies, read_latencies = [], []
+    login_statuses, read_statuses = {}, {}
+    login_url = f"{args.api}/auth/login"
+    product_url = f"{args.api}/products/products/{args.product_id}"
+
+    async def login(client):
+        return await client.post(
+            login_url, data={"username": args.email, "password": args.password}
+        )
+
+    async def read(client):
+        return await client.get(product_url)
+
+    limits = httpx.Limits(max_connections=args.logins + args.readers)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *[
+                worker(client, deadline, login, login_latencies, login_statuses)
+                for _ in range(args.logins)
+            ],
+            *[
+                worker(client, deadline, read, read_latencies, read_statuses)
+                for _ in range(args.readers)
+            ],
+        )
+
+    for name, latencies, statuses in (
+        ("login", login_latencies, login_statuses),
+        ("product read", read_latencies, read_statuses),
+    ):
+        print(
+            f"{name:>13}: n={len(latencies):6d} "
+            f"p50={percentile(latencies, 50):8.1f}ms "
+            f"p99={percentile(latencies, 99):8.1f}ms "
+            f"mean={statistics.fmean(latencies) if latencies else 0:8.1f}ms "
+            f"status={dict(sorted(statuses.items()))}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api", default="/api/v1")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--logins", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--readers", type=int, default=50, help="concurrent read clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
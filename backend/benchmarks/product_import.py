@@ -0,0 +1,78 @@
+"""Bulk product import throughput against a running API.
+
+Streams a generated CSV or NDJSON catalog to POST /products/products/import
+(never materialized in memory) and reports rows/second and the import report.
+
+    uvicorn app.main:app --workers 1
+    python benchmarks/product_import.py --email admin@example.com \
+        --password adminpassword --category-id 1 --rows 100000
+
+Requires httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+async def generate(args):
+    if args.format == "csv":
+        yield b"name,description,price,category_id\n"
+    for start in range(0, args.rows, 1000):
+        lines = []
+        for i in range(start, min(start + 1000, args.rows)):
+            name = f"{args.prefix} {i}"
+            price = f"{1 + i % 10000 / 100:.2f}"
+            if args.format == "csv":
+                lines.append(f'"{name}","Imported product {i}",{price},{args.category_id}\n')
+            else:
+                row = {"name": name, "description": f"Imported product {i}", "price": price,
+                       "category_id": args.category_id}
+                lines.append(json.dumps(row) + "\n")
+        yield "".join(lines).encode()
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        login = await client.post(
+            f"{args.api}/auth/login", data={"username": args.email, "password": args.password}
+        )
+        login.raise_for_status()
+        token = login.json()["access_token"]
+        content_type = "text/csv" if args.format == "csv" else "application/x-ndjson"
+
+        start = time.perf_counter()
+        response = await client.post(
+            f"{args.api}/products/products/import",
+            content=generate(args),
+            headers={"Authorization": f"Bearer {token}", "Content-Type": content_type},
+        )
+        elapsed = time.perf_counter() - start
+
+    report = response.json()
+    print(f"status={response.status_code} rows={args.rows} elapsed={elapsed:.2f}s "
+          f"rate={args.rows / elapsed:,.0f} rows/s")
+    if isinstance(report, dict):
+        print({key: value for key, value in report.items() if key != "errors"})
+        for error in report.get("errors", [])[:10]:
+            print(f"  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api", default="/api/v1")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--category-id", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--prefix", default="Imported", help="product name prefix, rerun to upsert")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
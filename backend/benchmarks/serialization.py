@@ -0,0 +1,172 @@
+"""Response serialization cost per schema, no database or server needed.
+
+Builds transient ORM objects the way list pages return them (orders with their
+product and customer, messages with sender and receiver) and times, per page:
+
+    fastapi   response_model validate + dump to dicts + stdlib JSONResponse
+    orjson    the same, rendered with ORJSONResponse (the app default)
+    fast      app.core.serialization.dump_json, one validate and pydantic-core JSON
+    trusted   ORJSONResponse of already-serialized dicts (cache entries)
+
+    PYTHONPATH=. python benchmarks/serialization.py --page-size 100 --rounds 200
+    PYTHONPATH=. python benchmarks/serialization.py --budget-us 40
+
+With --budget-us the script exits non-zero when the fast path costs more than
+that many microseconds per item for any schema, so CI can catch regressions.
+The app modules are imported, so the usual settings (.env / POSTGRES_*, SECRET_KEY) apply.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.serialization import adapter, dump_json
+from app.models import Category, Messages, Orders, Product, User
+from app.models.orders import OrderStatus
+from app.models.schemas.message import Message
+from app.models.schemas.order import Order
+from app.models.schemas.product import Product as ProductOut
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_user(i):
+    return User(
+        id=i,
+        email=f"user{i}@example.com",
+        first_name=f"First{i}",
+        last_name=f"Last{i}",
+        phone_number=f"09{i:08d}",
+        hashed_password="x",
+        status="ACTIVE",
+        role="USER",
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def make_category():
+    return Category(id=1, name="Tools", description="Hand and power tools", created_at=NOW, updated_at=NOW)
+
+
+def make_product(i, category):
+    return Product(
+        id=i,
+        name=f"Product {i}",
+        description=f"Description of product {i}",
+        price=Decimal("19.99"),
+        category_id=category.id,
+        category=category,
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def make_orders(n):
+    users = [make_user(i) for i in range(1, 21)]
+    category = make_category()
+    products = [make_product(i, category) for i in range(1, 51)]
+    return [
+        Orders(
+            id=i,
+            order_number=1000 + i,
+            product_id=products[i % 50].id,
+            product=products[i % 50],
+            customer_id=users[i % 20].id,
+            customer=users[i % 20],
+            status=OrderStatus.APPROVED if i % 2 else OrderStatus.REQUEST,
+            requested_by=users[i % 20].id,
+            approved_by=1 if i % 2 else None,
+            date_requested=NOW + timedelta(minutes=i),
+            date_approved=NOW + timedelta(minutes=i + 5) if i % 2 else None,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def make_messages(n):
+    users = [make_user(i) for i in range(1, 21)]
+    return [
+        Messages(
+            id=i,
+            message=f"Message number {i} about order {1000 + i}",
+            sender_id=users[i % 20].id,
+            sender=users[i % 20],
+            receiver_id=users[(i + 1) % 20].id,
+            receiver=users[(i + 1) % 20],
+            date_time_sent=NOW + timedelta(seconds=i),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def time_per_item(fn, items, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) / items * 1e6)
+    return statistics.median(samples)
+
+
+def bench(name, schema, objects, rounds):
+    field = create_response_field(name=f"Response_{name}", type_=schema)
+
+    def fastapi_path(response_class):
+        # What a route with response_model does with a returned list
+        content = asyncio.run(serialize_response(field=field, response_content=objects))
+        return response_class(content).body
+
+    trusted = adapter(schema).dump_python(
+        adapter(schema).validate_python(objects, from_attributes=True), mode="json"
+    )
+    assert ORJSONResponse(trusted).body == dump_json(schema, objects), "fast path output differs"
+
+    results = {
+        "fastapi": time_per_item(lambda: fastapi_path(JSONResponse), len(objects), rounds),
+        "orjson": time_per_item(lambda: fastapi_path(ORJSONResponse), len(objects), rounds),
+        "fast": time_per_item(lambda: dump_json(schema, objects), len(objects), rounds),
+        "trusted": time_per_item(lambda: ORJSONResponse(trusted).body, len(objects), rounds),
+    }
+    print(
+        f"{name:<10}"
+        + "".join(f"{path:>9} {us:7.1f}us" for path, us in results.items())
+        + f"   x{results['fastapi'] / results['fast']:.1f}"
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--budget-us", type=float, default=None, help="fail above this fast-path cost per item")
+    args = parser.parse_args()
+
+    category = make_category()
+    cases = [
+        ("Order", List[Order], make_orders(args.page_size)),
+        ("Message", List[Message], make_messages(args.page_size)),
+        ("Product", List[ProductOut], [make_product(i, category) for i in range(1, args.page_size + 1)]),
+    ]
+    print(f"median cost per item, page of {args.page_size}, {args.rounds} rounds")
+    over = []
+    for name, schema, objects in cases:
+        results = bench(name, schema, objects, args.rounds)
+        if args.budget_us is not None and results["fast"] > args.budget_us:
+            over.append(name)
+    if over:
+        print(f"fast path over budget ({args.budget_us}us/item): {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Worker startup time, what each of N workers pays on every (rolling) restart.
+
+Starts fresh interpreters and times the import of app.main and the lifespan
+startup, as uvicorn/gunicorn workers do. With --legacy each run also does what
+startup used to do before migrations and the create-default-user command:
+Base.metadata.create_all against the configured database, the "any user?"
+query and one bcrypt hash.
+
+    PYTHONPATH=. python benchmarks/startup.py --runs 10
+    PYTHONPATH=. python benchmarks/startup.py --runs 10 --legacy
+
+--legacy needs the configured Postgres (.env / POSTGRES_*); the default run
+needs no database, the engine connects lazily.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+WORKER = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        legacy = None
+        if "--legacy" in sys.argv:
+            from sqlalchemy import select
+            from app.core.security import password_hasher
+            from app.db.session import Base, SessionLocal, engine
+            from app.models import User
+            legacy_start = time.perf_counter()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with SessionLocal() as db:
+                await db.scalar(select(User).limit(1))
+            await password_hasher.hash("adminpassword")
+            legacy = time.perf_counter() - legacy_start
+    return ready, legacy
+
+ready, legacy = asyncio.run(boot())
+print(json.dumps({"import": imported - started, "lifespan": ready - imported, "legacy": legacy}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--legacy", action="store_true", help="also time the old create_all + seeding startup")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        command = [sys.executable, "-c", WORKER] + (["--legacy"] if args.legacy else [])
+        out = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    def report(name, values):
+        print(f"{name:<22} median {statistics.median(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+    print(f"{args.runs} worker starts")
+    report("import app.main", [s["import"] for s in samples])
+    report("lifespan startup", [s["lifespan"] for s in samples])
+    report("import + startup", [s["import"] + s["lifespan"] for s in samples])
+    if args.legacy:
+        report("old create_all + seed", [s["legacy"] for s in samples])
+
+
+if __name__ == "__main__":
+    main()